@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Compares the memory use and lookup time of the permission caches.
+
+Caches the decisions of 20 permissions for 10,000 model instances in a
+LRUPermissionCache and a CompactPermissionCache.
+
+Usage:
+    python benchmarks/compact_cache.py [--permissions 20] [--objects 10000]
+"""
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django_logical_perms.caches import (  # noqa: E402
+    assign_permission_id,
+    CompactPermissionCache,
+    get_object_key,
+    LRUPermissionCache,
+)
+from django_logical_perms.permissions import FunctionalLogicalPermission  # noqa: E402
+
+
+def fill(cache, keys):
+    for index, key in enumerate(keys):
+        cache.set(key, index % 3 == 0)
+
+
+def measure(cache_class, keys):
+    tracemalloc.start()
+    cache = cache_class()
+    fill(cache, keys)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    lookup = min(timeit.repeat(lambda: [cache.get(key) for key in keys], number=1, repeat=5))
+    return cache, size, lookup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--permissions', type=int, default=20)
+    parser.add_argument('--objects', type=int, default=10000)
+    args = parser.parse_args()
+
+    permissions = [
+        FunctionalLogicalPermission(lambda user, obj=None: True, label='benchmark.perm_{}'.format(index))
+        for index in range(args.permissions)]
+
+    for permission in permissions:
+        assign_permission_id(permission)
+
+    # Keys are derived up front, so that only the caches are measured.
+    objects = [get_object_key(User(pk=pk)) for pk in range(1, args.objects + 1)]
+    keys = [(permission, key) for permission in permissions for key in objects]
+
+    print('{} decisions ({} permissions x {} objects)\n'.format(len(keys), args.permissions, args.objects))
+    print('{:<24} {:>12} {:>16} {:>14}'.format('cache', 'memory', 'bytes/decision', 'lookup'))
+
+    for cache_class in (LRUPermissionCache, CompactPermissionCache):
+        cache, size, lookup = measure(cache_class, keys)
+        assert len(cache) == len(keys)
+
+        print('{:<24} {:>9.1f} MB {:>16.1f} {:>11.1f} ms'.format(
+            cache_class.__name__, size / 1024.0 / 1024.0, size / float(len(keys)), lookup * 1000))
+
+
+if __name__ == '__main__':
+    main()
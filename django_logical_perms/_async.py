@@ -0,0 +1,270 @@
+"""
+Coroutine-based evaluation of permissions.
+
+This module uses ``async def`` syntax and is therefore only imported on
+Python 3. The mixins are combined with the permission classes in the
+``permissions`` module.
+"""
+import asyncio
+import functools
+import inspect
+
+from django.core.exceptions import PermissionDenied
+
+from .caches import MISSING, UNCACHEABLE
+from .exceptions import EvaluationTimeout
+
+try:
+    from asgiref.sync import async_to_sync, sync_to_async
+except ImportError:  # pragma: no cover
+    async_to_sync = sync_to_async = None
+
+
+def is_coroutine_function(func):
+    return inspect.iscoroutinefunction(func)
+
+
+def make_sync(func):
+    """
+    Wrap a coroutine function so that it can be called synchronously.
+    """
+    if async_to_sync is not None:
+        return async_to_sync(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        loop = asyncio.new_event_loop()
+
+        try:
+            return loop.run_until_complete(func(*args, **kwargs))
+        finally:
+            loop.close()
+
+    return wrapper
+
+
+async def run_sync(func, *args):
+    """
+    Run a synchronous function from a coroutine without blocking the event loop.
+
+    The function runs in a thread executor. If asgiref is available, Django's
+    ``sync_to_async`` is used so that the ORM can safely be used.
+    """
+    if sync_to_async is not None:
+        return await sync_to_async(func)(*args)
+
+    return await asyncio.get_event_loop().run_in_executor(None, functools.partial(func, *args))
+
+
+class AsyncLogicalPermissionMixin(object):
+    async def ahas_permission(self, user, obj=None):
+        """
+        Asynchronously test the permission against a User and an optional object.
+
+        You can override this method to implement the permission natively
+        without blocking the event loop. By default ``has_permission`` is run
+        in a thread executor.
+
+        Args:
+            user (User): A Django User object to test the permission against.
+            obj (object): An optional object to do object-level permissions.
+
+        Returns:
+            bool: True if the permission was granted.
+        """
+        return await run_sync(self.has_permission, user, obj)
+
+    async def _aevaluate(self, user, obj, key):
+        single_flight, coalescing_key, timeout = self._get_coalescing(user, key)
+
+        if coalescing_key is None:
+            return await self.ahas_permission(user, obj)
+
+        return await single_flight.ado(coalescing_key, self.ahas_permission, user, obj, timeout=timeout)
+
+    async def atest(self, user, obj=None):
+        """
+        Asynchronously test and cache the permission.
+
+        This is the asynchronous counterpart of ``test`` and uses the same
+        caches. The permission is evaluated through ``ahas_permission``.
+
+        Args:
+            user (User): A Django User object to test the permission against.
+            obj (object): An optional object to do object-level permissions.
+
+        Returns:
+            bool: True if the permission was granted.
+        """
+        if self.cache is None:
+            return await self.ahas_permission(user, obj)
+
+        key = self.cache_key(user, obj)
+
+        if key is UNCACHEABLE:
+            return await self.ahas_permission(user, obj)
+
+        cache = self._get_cache(user)
+        result = cache.get((self, key), MISSING)
+
+        if result is MISSING:
+            shared_cache = self._get_shared_cache()
+
+            # The shared cache may use the network, so don't block the loop.
+            if shared_cache is not None:
+                generations = await run_sync(shared_cache.get_generations, self, user)
+                result = await run_sync(
+                    shared_cache.get, self, user, key, MISSING, generations, self._get_refresh(user, obj))
+
+            if result is MISSING:
+                result = await self._aevaluate(user, obj, key)
+
+                if shared_cache is not None:
+                    await run_sync(shared_cache.set, self, user, key, result, generations)
+
+            self._store(cache, key, result)
+
+        return result
+
+
+class AsyncAnyOfMixin(object):
+    async def ahas_permission(self, user, obj=None):
+        for operand in self.operands:
+            if await operand.atest(user, obj):
+                return True
+
+        return False
+
+
+class AsyncAllOfMixin(object):
+    async def ahas_permission(self, user, obj=None):
+        for operand in self.operands:
+            if not await operand.atest(user, obj):
+                return False
+
+        return True
+
+
+class AsyncXorOfMixin(object):
+    async def ahas_permission(self, user, obj=None):
+        result = False
+
+        for operand in self.operands:
+            if await operand.atest(user, obj):
+                result = not result
+
+        return result
+
+
+class AsyncAtLeastMixin(object):
+    async def ahas_permission(self, user, obj=None):
+        granted = 0
+        remaining = len(self.operands)
+
+        for operand in self.operands:
+            if granted >= self.count or granted + remaining < self.count:
+                break
+
+            remaining -= 1
+
+            if await operand.atest(user, obj):
+                granted += 1
+
+        return granted >= self.count
+
+
+class AsyncNotMixin(object):
+    async def ahas_permission(self, user, obj=None):
+        return not await self.operand.atest(user, obj)
+
+
+class AsyncUserHasPermMixin(object):
+    async def ahas_permission(self, user, obj=None):
+        # Django 5.0 and up provide an asynchronous permission check.
+        if hasattr(user, 'ahas_perm'):
+            return await user.ahas_perm(self.perm, obj)
+
+        return await run_sync(user.has_perm, self.perm, obj)
+
+
+class AsyncSingleFlightMixin(object):
+    async def ado(self, key, func, *args, timeout=None):
+        """
+        Await a coroutine function, unless a call with the same key is already running.
+
+        This is the asynchronous counterpart of ``do``. Calls are only
+        coalesced with calls on the same event loop.
+
+        Args:
+            key (object): Hashable key that identifies identical calls.
+            func (callable): The coroutine function to await.
+            *args: The arguments to call the function with.
+            timeout (float): Optional number of seconds to wait for the
+                running call. Waits indefinitely if it's not set.
+
+        Returns:
+            The outcome of the (coalesced) call.
+
+        Raises:
+            EvaluationTimeout: If the running call didn't finish in time.
+        """
+        loop = asyncio.get_event_loop()
+        calls_key = (loop, key)
+        future = self._async_calls.get(calls_key)
+
+        if future is None:
+            future = self._async_calls[calls_key] = loop.create_future()
+
+            try:
+                result = await func(*args)
+            except Exception as error:
+                future.set_exception(error)
+
+                # Waiters get the exception, so it doesn't need to be logged.
+                future.exception()
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                del self._async_calls[calls_key]
+
+                # The waiters are cancelled along with the running call.
+                if not future.done():
+                    future.cancel()
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            raise EvaluationTimeout('Timed out waiting for the evaluation of {!r}.'.format(key))
+
+
+class AsyncLogicalPermissionsBackendMixin(object):
+    async def ahas_perm(self, user_obj, perm, obj=None):
+        """
+        Asynchronously check whether a user has a given permission on an optional object.
+
+        This is the asynchronous counterpart of ``has_perm``, used by Django's
+        ``user.ahas_perm``.
+
+        Args:
+            user_obj (User): The Django User to evaluate the permission on.
+            perm (str): The label of the permission.
+            obj: Optional object to do object-level permission checks.
+
+        Returns:
+            bool: True if the user was granted the permission.
+
+        Raises:
+            PermissionDenied: Short-circuits the permission evaluation if
+                the permission was explicitly denied.
+        """
+        permission = self.get_logical_permission(perm)
+
+        if permission is None:
+            return False
+
+        if not await permission.atest(user_obj, obj):
+            raise PermissionDenied()
+
+        return True
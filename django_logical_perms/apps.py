@@ -1,10 +1,40 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save
 
-from .loaders import load_all_permissions_modules
+from .caches import evict_dependent_decisions
+from .loaders import load_all_permissions_modules, read_manifest
+from .ordering import get_operand_ordering_settings
+from .storages import default_storage
 
 
 class DjangoLogicalPermsConfig(AppConfig):
     name = 'django_logical_perms'
 
+    permissions_module_loads = ()
+    """tuple: The :data:`~django_logical_perms.loaders.PermissionsModuleLoad` of every app at start up."""
+
     def ready(self):
-        load_all_permissions_modules()
+        manifest = read_manifest()
+
+        # The statistics file is read once, also when modules are loaded lazily.
+        ordering_settings = get_operand_ordering_settings()
+
+        if manifest is None:
+            self.permissions_module_loads = tuple(load_all_permissions_modules(yield_loads=True))
+
+            # All permissions modules have been loaded, so the registered
+            # composite permissions won't change anymore.
+            default_storage.prepare_permissions(ordering_settings)
+        else:
+            # Permissions modules are imported when one of their permissions
+            # is first looked up.
+            default_storage.prepare_permissions(ordering_settings)
+            default_storage.load_lazily(manifest)
+
+        if getattr(settings, 'PERMISSIONS_FREEZE_STORAGE', False):
+            default_storage.freeze()
+
+        # Evict cached decisions of permissions that depend on changed models.
+        for signal in (post_save, post_delete, m2m_changed):
+            signal.connect(evict_dependent_decisions, dispatch_uid='django_logical_perms.evict_dependent_decisions')
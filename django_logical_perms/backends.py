@@ -1,10 +1,91 @@
+import threading
+
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 
+from .caches import get_object_key, get_user_cache, MISSING, UNCACHEABLE
 from .exceptions import PermissionNotFound
+from .permissions import CompositeLogicalPermission, SCOPE_OBJECT
 from .storages import default_storage
 
+try:
+    from ._async import AsyncLogicalPermissionsBackendMixin
+except SyntaxError:  # pragma: no cover
+    # Coroutines are not supported on Python 2.
+    AsyncLogicalPermissionsBackendMixin = object
+
+
+# The prefixes are looked up once, as the backend is asked about every
+# permission check in the project.
+_label_prefixes = []
+
+
+def get_label_prefixes():
+    """
+    Get the prefixes of the labels that logical permissions may have.
+
+    Returns:
+        tuple: The prefixes from the ``PERMISSIONS_LABEL_PREFIXES`` setting,
+        or None if any label may be a logical permission.
+    """
+    if not _label_prefixes:
+        prefixes = getattr(settings, 'PERMISSIONS_LABEL_PREFIXES', None)
+
+        if isinstance(prefixes, str):
+            prefixes = (prefixes,)
+
+        _label_prefixes.append(tuple(prefixes) if prefixes is not None else None)
+
+    return _label_prefixes[0]
+
+
+@receiver(setting_changed)
+def reset_label_prefixes(setting, **kwargs):
+    if setting == 'PERMISSIONS_LABEL_PREFIXES':
+        del _label_prefixes[:]
+
+
+# The permissions that the labels of all granted permissions are cached
+# under, combined so that invalidating any of them invalidates the labels.
+# They're combined again whenever the registered permissions change.
+_all_permissions_key = [None, None, None, None]
+_all_permissions_key_lock = threading.Lock()
+
+
+def _is_cached_along(permission):
+    # Decisions that aren't cached, or that expire, are evaluated every time
+    # instead of being cached along with the labels of the others.
+    return permission.cache is not None and permission.ttl is None
+
 
-class LogicalPermissionsBackend(object):
+def _get_all_permissions_key():
+    with _all_permissions_key_lock:
+        if _all_permissions_key[0] != default_storage.generation:
+            # The generation is read first, so that permissions registered
+            # meanwhile make the key outdated rather than go unnoticed.
+            generation = default_storage.generation
+            permissions = dict(default_storage.get_loaded_permissions())
+            cached = dict((label, perm) for label, perm in permissions.items() if _is_cached_along(perm))
+            live = dict((label, perm) for label, perm in permissions.items() if label not in cached)
+            _all_permissions_key[:] = [generation, CompositeLogicalPermission(*cached.values()), cached, live]
+
+        return tuple(_all_permissions_key)
+
+
+def _is_granted(permission, user_obj, obj):
+    # Permissions that only depend on the object can't be evaluated without one.
+    if obj is None and permission.scope == SCOPE_OBJECT:
+        return False
+
+    try:
+        return permission(user_obj, obj)
+    except PermissionDenied:
+        return False
+
+
+class LogicalPermissionsBackend(AsyncLogicalPermissionsBackendMixin):
     """
     A Django auth-compatible backend for checking permissions.
     """
@@ -12,6 +93,33 @@ class LogicalPermissionsBackend(object):
     def authenticate(self, *args, **kwargs):
         return None
 
+    def get_logical_permission(self, perm):
+        """
+        Get a logical permission from the default storage.
+
+        Args:
+            perm (str): The label of the permission.
+
+        Returns:
+            BaseLogicalPermission: The permission or None if there is no
+            logical permission registered with the label.
+        """
+        # Reject the labels of other permissions, such as Django's model
+        # permissions, without looking them up.
+        prefixes = get_label_prefixes()
+
+        if prefixes is not None and not perm.startswith(prefixes):
+            return None
+
+        if perm not in default_storage:
+            return None
+
+        try:
+            return default_storage.get_permission(perm)
+        except PermissionNotFound:
+            # The manifest of lazily loaded permissions may be outdated.
+            return None
+
     def has_perm(self, user_obj, perm, obj=None):
         """
         Check whether a user has a given permission on an optional object.
@@ -20,8 +128,11 @@ class LogicalPermissionsBackend(object):
         implementation of the permission. This normally would invoke the
         ``test`` method on those permissions - which also does caching.
 
-        In order to clear the cache you must re-fetch the User instance,
-        just as with the default Django permissions.
+        In order to clear the cache you can re-fetch the User instance, just
+        as with the default Django permissions, or use
+        :func:`~django_logical_perms.caches.invalidate`. Decisions of
+        permissions that declare the models they depend on are evicted when
+        instances of those models are saved or deleted.
 
         Args:
             user_obj (User): The Django User to evaluate the permission on.
@@ -36,14 +147,103 @@ class LogicalPermissionsBackend(object):
             PermissionDenied: Short-circuits the permission evaluation if
                 the permission was explicitly denied.
         """
-        try:
-            # Fetch the permission from the default storage.
-            permission = default_storage.get_permission(perm)
+        # Fetch the permission from the default storage.
+        permission = self.get_logical_permission(perm)
 
-            if not permission(user_obj, obj):
-                raise PermissionDenied()
+        if permission is None:
+            return False
 
-            return True
+        if not permission(user_obj, obj):
+            raise PermissionDenied()
 
-        except PermissionNotFound:
-            return False
+        return True
+
+    def has_perms(self, user_obj, perm_list, obj=None):
+        """
+        Check whether a user has all of the given permissions on an optional object.
+
+        The permissions are evaluated in order and the evaluation stops at the
+        first permission that isn't granted. If the labels of all granted
+        permissions have been cached by :meth:`get_all_permissions`, they
+        are used instead, except for the permissions that aren't cached or
+        whose decisions expire. Unlike ``has_perm``, denied permissions don't
+        raise :class:`PermissionDenied`.
+
+        Note:
+            Django's ``user.has_perms`` calls ``has_perm`` for every label, so
+            call this method on the backend to check the labels at once.
+
+        Args:
+            user_obj (User): The Django User to evaluate the permissions on.
+            perm_list (iterable): The labels of the permissions.
+            obj: Optional object to do object-level permission checks.
+
+        Returns:
+            bool: True if the user was granted all permissions. False if any
+            of them was denied or isn't a logical permission.
+        """
+        granted, live = self._get_cached_permissions(user_obj, obj)
+
+        for perm in perm_list:
+            if granted is not None and perm not in live:
+                if perm not in granted:
+                    return False
+
+                continue
+
+            permission = self.get_logical_permission(perm)
+
+            if permission is None or not permission(user_obj, obj):
+                return False
+
+        return True
+
+    def get_all_permissions(self, user_obj, obj=None):
+        """
+        Get the labels of all logical permissions a user has on an optional object.
+
+        All registered permissions are evaluated in a single pass. The labels
+        are cached in the user's permission cache, so they're invalidated
+        along with the decisions of the permissions. Permissions that aren't
+        cached or whose decisions expire are evaluated every time. Without an
+        object, permissions with the ``'object'`` scope aren't granted.
+
+        Args:
+            user_obj (User): The Django User to evaluate the permissions on.
+            obj: Optional object to do object-level permission checks.
+
+        Returns:
+            set: The labels of the granted permissions.
+        """
+        # Import the permissions modules that are loaded lazily.
+        default_storage.get_all_permissions()
+
+        _, all_permissions_key, permissions, live = _get_all_permissions_key()
+        key = get_object_key(obj)
+        granted = MISSING
+
+        if key is not UNCACHEABLE:
+            cache = get_user_cache(user_obj)
+            cache_key = (all_permissions_key, key)
+            granted = cache.get(cache_key, MISSING)
+
+        if granted is MISSING:
+            granted = frozenset(
+                label for label, permission in permissions.items() if _is_granted(permission, user_obj, obj))
+
+            if key is not UNCACHEABLE:
+                cache.set(cache_key, granted)
+
+        return set(granted).union(
+            label for label, permission in live.items() if _is_granted(permission, user_obj, obj))
+
+    def _get_cached_permissions(self, user_obj, obj):
+        key = get_object_key(obj)
+        generation, all_permissions_key, _, live = _all_permissions_key
+
+        # The cached labels don't reflect the permissions that were registered or removed since.
+        if key is UNCACHEABLE or generation != default_storage.generation:
+            return None, None
+
+        granted = get_user_cache(user_obj).get((all_permissions_key, key), MISSING)
+        return (None, None) if granted is MISSING else (granted, live)
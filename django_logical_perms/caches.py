@@ -0,0 +1,1384 @@
+import hashlib
+import logging
+import random
+import sys
+import threading
+import time
+import weakref
+from collections import defaultdict, OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+try:
+    from contextvars import ContextVar
+except ImportError:  # pragma: no cover
+    ContextVar = None
+
+MISSING = object()
+"""object: Sentinel returned by caches when no (valid) entry exists for a key."""
+
+UNCACHEABLE = object()
+"""object: Sentinel key for objects that permission decisions can't be cached for."""
+
+_now = getattr(time, 'monotonic', time.time)
+
+logger = logging.getLogger(__name__)
+
+_STABLE_TYPES = (type(None), bool, int, float, str, bytes)
+
+
+class _ModelKey(object):
+    # Tags the keys of model instances, so that they never equal a tuple
+    # with the same values. Its repr is the same in every process.
+    __slots__ = ()
+
+    def __repr__(self):
+        return '_MODEL_KEY'
+
+    def __reduce__(self):
+        return '_MODEL_KEY'
+
+
+_MODEL_KEY = _ModelKey()
+
+
+class _UncacheableObject(Exception):
+    pass
+
+
+def _derive_object_key(obj):
+    if obj is None or isinstance(obj, _STABLE_TYPES):
+        return obj
+
+    meta = getattr(obj, '_meta', None)
+
+    if meta is not None and hasattr(obj, 'pk'):
+        if obj.pk is None:
+            raise _UncacheableObject()
+
+        return _MODEL_KEY, meta.app_label, meta.model_name, obj.pk
+
+    if isinstance(obj, (list, tuple)):
+        return tuple(_derive_object_key(item) for item in obj)
+
+    # Sort the contents of unordered collections so that equal
+    # collections always get the same key.
+    if isinstance(obj, (set, frozenset)):
+        return tuple(sorted((_derive_object_key(item) for item in obj), key=repr))
+
+    if isinstance(obj, dict):
+        return tuple(sorted(
+            ((_derive_object_key(key), _derive_object_key(value)) for key, value in obj.items()), key=repr))
+
+    try:
+        hash(obj)
+    except TypeError:
+        raise _UncacheableObject()
+
+    references = getattr(settings, 'PERMISSIONS_CACHE_OBJECT_REFERENCES', 'strong')
+
+    if references == 'none':
+        raise _UncacheableObject()
+
+    # Objects that are only equal to themselves can be referred to weakly
+    # without changing which decisions are shared. Not all objects support
+    # weak references, though.
+    if references == 'weak' and type(obj).__eq__ is object.__eq__:
+        try:
+            return WeakObjectKey(obj)
+        except TypeError:
+            raise _UncacheableObject()
+
+    return obj
+
+
+_collected_objects = [0]
+"""list: The number of objects referred to by weak keys that have been garbage collected."""
+
+
+def _object_collected(ref):
+    _collected_objects[0] += 1
+
+
+class WeakObjectKey(object):
+    """
+    A cache key that refers to an object without keeping it alive.
+
+    Weak keys are equal if they refer to the very same object, which is still
+    alive. Decisions cached under the key of an object that has been garbage
+    collected can never be found again, so caches drop them the next time
+    they store a decision.
+    """
+
+    __slots__ = ('ref', 'hash')
+
+    def __init__(self, obj):
+        self.ref = weakref.ref(obj, _object_collected)
+        self.hash = id(obj)
+
+    @property
+    def alive(self):
+        """bool: Whether the object is still alive."""
+        return self.ref() is not None
+
+    def __eq__(self, other):
+        if not isinstance(other, WeakObjectKey):
+            return False
+
+        obj = self.ref()
+        return obj is not None and obj is other.ref()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return self.hash
+
+    def __repr__(self):
+        return 'WeakObjectKey({!r})'.format(self.ref())
+
+
+def get_object_key(obj):
+    """
+    Derive a cache key for the object a permission is evaluated against.
+
+    Model instances are keyed by ``(app_label, model_name, pk)`` so that
+    separately fetched instances of the same row share their decisions
+    and the cache doesn't keep the instances alive. The key is tagged, so
+    it never equals a tuple of the same values. Lists, tuples, sets and
+    dicts are keyed by their (recursively derived) contents. Any other
+    hashable object is used as its own key, unless the
+    ``PERMISSIONS_CACHE_OBJECT_REFERENCES`` setting is ``'weak'`` (objects
+    that are only equal to themselves are referred to by a
+    :class:`WeakObjectKey`) or ``'none'`` (the object can't be cached).
+
+    Args:
+        obj (object): The object the permission is evaluated against.
+
+    Returns:
+        object: A hashable key or :data:`UNCACHEABLE` if there is no way to
+        derive a key, such as for unsaved model instances.
+    """
+    try:
+        return _derive_object_key(obj)
+    except _UncacheableObject:
+        return UNCACHEABLE
+
+
+def is_stable_key(key):
+    """
+    Check whether a key looks the same in every process.
+
+    Args:
+        key (object): A key derived by :func:`get_object_key`.
+
+    Returns:
+        bool: True if the key only consists of primitive values, tuples and
+        the keys of model instances.
+    """
+    if isinstance(key, tuple):
+        return all(is_stable_key(item) for item in key)
+
+    return isinstance(key, _STABLE_TYPES) or key is _MODEL_KEY
+
+
+def _estimate_key_size(key):
+    if isinstance(key, tuple):
+        return sys.getsizeof(key) + sum(_estimate_key_size(item) for item in key)
+
+    if isinstance(key, _STABLE_TYPES):
+        return sys.getsizeof(key)
+
+    # Permissions and the objects referred to by keys are not owned by the
+    # cache, only the reference to them is.
+    return sys.getsizeof(key) if isinstance(key, WeakObjectKey) else 0
+
+
+class BasePermissionCache(object):
+    """
+    The very base implementation of a per-user permission decision cache.
+
+    A cache instance is attached to a User object and stores the outcome of
+    permission evaluations for that user. Extend this class and point the
+    ``PERMISSIONS_CACHE_CLASS`` setting to it to implement your own caching
+    strategy. The class gets instantiated with the ``max_size`` and ``ttl``
+    keyword arguments taken from the settings.
+    """
+
+    owner = None
+    """The key of the user the cache belongs to, as derived by :func:`get_object_key`."""
+
+    def get(self, key, default=MISSING):
+        """
+        Get a cached decision.
+
+        Args:
+            key (tuple): The cache key, normally ``(permission, object key)``.
+            default: Value to return if there is no cached decision.
+
+        Returns:
+            bool: The cached decision or ``default`` if there is none.
+
+        Raises:
+            NotImplementedError: This method must be implemented in classes
+                that extend this base class.
+        """
+        raise NotImplementedError()
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a decision in the cache.
+
+        Args:
+            key (tuple): The cache key, normally ``(permission, object key)``.
+            value (bool): The decision to store.
+            ttl (int, float): Optional number of seconds the decision stays
+                valid, overriding the default of the cache. It's only passed
+                for permissions that set their own ``ttl``.
+
+        Raises:
+            NotImplementedError: This method must be implemented in classes
+                that extend this base class.
+        """
+        raise NotImplementedError()
+
+    def clear(self):
+        """
+        Remove all decisions from the cache.
+
+        Raises:
+            NotImplementedError: This method must be implemented in classes
+                that extend this base class.
+        """
+        raise NotImplementedError()
+
+    def evict(self, predicate):
+        """
+        Remove the decisions whose key matches a predicate.
+
+        Args:
+            predicate (callable): Function that takes a cache key and returns
+                True if the decision should be removed.
+
+        Raises:
+            NotImplementedError: This method must be implemented in classes
+                that extend this base class.
+        """
+        raise NotImplementedError()
+
+    def keys(self):
+        """
+        Get the keys of all cached decisions.
+
+        Returns:
+            list: The cache keys.
+
+        Raises:
+            NotImplementedError: This method must be implemented in classes
+                that extend this base class.
+        """
+        raise NotImplementedError()
+
+    def estimate_size(self):
+        """
+        Estimate the memory used by the cache.
+
+        Returns:
+            int: The estimated number of bytes, excluding the permissions and
+            the objects that keys refer to.
+
+        Raises:
+            NotImplementedError: This method must be implemented in classes
+                that extend this base class.
+        """
+        raise NotImplementedError()
+
+    def __len__(self):
+        raise NotImplementedError()
+
+
+class LRUPermissionCache(BasePermissionCache):
+    """
+    A size-bounded permission cache with optional expiry of its entries.
+
+    When the cache grows beyond ``max_size`` entries, the least recently used
+    decisions are evicted first. Entries older than ``ttl`` seconds are
+    treated as missing and are dropped on access.
+
+    The cache can be used from multiple threads, e.g. when operands are
+    evaluated in parallel. An unbounded cache doesn't track the order of its
+    entries, so looking up a decision doesn't need a lock.
+    """
+
+    def __init__(self, max_size=None, ttl=None):
+        """
+        Initialise a new instance of LRUPermissionCache.
+
+        Args:
+            max_size (int): Optional maximum number of cached decisions. The
+                cache is unbounded if it's not set.
+            ttl (int, float): Optional number of seconds a decision stays
+                valid. Decisions never expire if it's not set.
+
+        Raises:
+            ValueError: If ``max_size`` is smaller than 1 or ``ttl`` is
+                negative.
+        """
+        if max_size is not None and max_size < 1:
+            raise ValueError('`max_size` must be at least 1.')
+
+        if ttl is not None and ttl < 0:
+            raise ValueError('`ttl` must not be negative.')
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._collected_objects = _collected_objects[0]
+
+    def get(self, key, default=MISSING):
+        if self.max_size is None:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return default
+
+            if entry[1] is not None and entry[1] <= _now():
+                with self._lock:
+                    if self._entries.get(key) is entry:
+                        del self._entries[key]
+
+                return default
+
+            return entry[0]
+
+        with self._lock:
+            try:
+                # Pop the entry and put it back so that it moves to the
+                # most recently used end of the dictionary.
+                value, expires_at = self._entries.pop(key)
+            except KeyError:
+                return default
+
+            if expires_at is not None and expires_at <= _now():
+                return default
+
+            self._entries[key] = (value, expires_at)
+
+        return value
+
+    def set(self, key, value, ttl=None):
+        if ttl is None:
+            ttl = self.ttl
+
+        expires_at = None if ttl is None else _now() + ttl
+
+        with self._lock:
+            # Drop the decisions for objects that have been garbage collected
+            # since, which can't be looked up anymore.
+            if self._collected_objects != _collected_objects[0]:
+                self._collected_objects = _collected_objects[0]
+
+                for dead_key in [dead_key for dead_key in self._entries if _has_dead_reference(dead_key)]:
+                    del self._entries[dead_key]
+
+            self._entries.pop(key, None)
+            self._entries[key] = (value, expires_at)
+
+            # Evict the least recently used entries.
+            if self.max_size is not None:
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def evict(self, predicate):
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+
+    def estimate_size(self):
+        with self._lock:
+            entries = list(self._entries.items())
+
+        return sys.getsizeof(self._entries) + sum(
+            _estimate_key_size(key) + sys.getsizeof(entry) for key, entry in entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_permission_ids = {}
+_permissions_by_id = []
+_permission_ids_lock = threading.Lock()
+
+
+def assign_permission_id(permission):
+    """
+    Give a permission a dense integer id.
+
+    Ids are assigned in order, starting at 0, and never change. Decisions of
+    permissions with an id can be stored compactly by
+    :class:`CompactPermissionCache`.
+
+    Args:
+        permission (BaseLogicalPermission): The permission.
+
+    Returns:
+        int: The id of the permission.
+    """
+    with _permission_ids_lock:
+        permission_id = _permission_ids.get(permission)
+
+        if permission_id is None:
+            permission_id = _permission_ids[permission] = len(_permissions_by_id)
+            _permissions_by_id.append(permission)
+
+    return permission_id
+
+
+def get_permission_id(permission):
+    """
+    Get the dense integer id of a permission.
+
+    Args:
+        permission (BaseLogicalPermission): The permission.
+
+    Returns:
+        int: The id of the permission or None if it doesn't have one.
+    """
+    return _permission_ids.get(permission)
+
+
+# Compact decisions are stored in a single byte.
+_DECISIONS = (MISSING, False, True)
+_UNKNOWN = 0
+_DENIED = 1
+_GRANTED = 2
+
+# A byte array may be this many times larger than the number of decisions it
+# holds before primary keys are considered too far apart.
+_MAX_SPARSENESS = 8
+_MIN_ARRAY_SIZE = 64
+
+
+class _DecisionArray(object):
+    __slots__ = ('state', 'size')
+
+    def __init__(self):
+        # The offset and the bytes are swapped at once, so that they can be
+        # read without a lock.
+        self.state = (0, bytearray())
+        self.size = 0
+
+
+class CompactPermissionCache(LRUPermissionCache):
+    """
+    A permission cache that packs the decisions of registered permissions.
+
+    Permissions get a dense integer id when they're registered with a
+    storage (see :func:`assign_permission_id`). Their boolean decisions are
+    stored in byte arrays rather than in a dictionary: one array for the
+    decisions that don't involve an object, indexed by the permission id,
+    and one array per permission and model, indexed by the primary keys of
+    the instances. A decision then takes a single byte instead of a
+    dictionary entry and a key tuple.
+
+    Other decisions fall back to the storage of :class:`LRUPermissionCache`,
+    to which ``max_size`` applies. That includes decisions that expire,
+    decisions for objects other than model instances, and instances with
+    primary keys that aren't integers or that are too far apart.
+    """
+
+    def __init__(self, max_size=None, ttl=None):
+        super(CompactPermissionCache, self).__init__(max_size=max_size, ttl=ttl)
+        self._arrays = {}
+
+    def _get_location(self, key):
+        if type(key) is not tuple or len(key) != 2:
+            return None
+
+        permission_id = _permission_ids.get(key[0])
+
+        if permission_id is None:
+            return None
+
+        object_key = key[1]
+
+        if object_key is None:
+            return None, permission_id
+
+        # Model instances are keyed by (tag, app label, model name, pk).
+        if type(object_key) is tuple and len(object_key) == 4 and object_key[0] is _MODEL_KEY and \
+                type(object_key[3]) is int:
+            return (permission_id, object_key[1], object_key[2]), object_key[3]
+
+        return None
+
+    def get(self, key, default=MISSING):
+        location = self._get_location(key)
+
+        if location is not None:
+            array = self._arrays.get(location[0])
+
+            if array is not None:
+                offset, values = array.state
+                index = location[1] - offset
+
+                if 0 <= index < len(values) and values[index] != _UNKNOWN:
+                    return _DECISIONS[values[index]]
+
+        if not self._entries:
+            return default
+
+        return super(CompactPermissionCache, self).get(key, default)
+
+    def set(self, key, value, ttl=None):
+        location = self._get_location(key)
+
+        if ttl is None:
+            ttl = self.ttl
+
+        if location is None or (value is not True and value is not False) or ttl is not None:
+            if location is not None:
+                self._set_decision(location, _UNKNOWN)
+
+            super(CompactPermissionCache, self).set(key, value, ttl=ttl)
+            return
+
+        if self._set_decision(location, _GRANTED if value else _DENIED):
+            with self._lock:
+                self._entries.pop(key, None)
+        else:
+            super(CompactPermissionCache, self).set(key, value, ttl=ttl)
+
+    def _set_decision(self, location, decision):
+        # Returns False if the decision can't be stored compactly.
+        array_key, position = location
+
+        with self._lock:
+            array = self._arrays.get(array_key)
+
+            if array is None:
+                if decision == _UNKNOWN:
+                    return True
+
+                array = self._arrays[array_key] = _DecisionArray()
+
+            offset, values = array.state
+
+            if not values:
+                offset = position
+
+            start = min(offset, position)
+            end = max(offset + len(values), position + 1)
+
+            # Don't let primary keys that are far apart blow up the array.
+            if end - start > max(_MIN_ARRAY_SIZE, _MAX_SPARSENESS * (array.size + 1)):
+                return False
+
+            if start < offset:
+                values = bytearray(offset - start) + values
+                offset = start
+
+            if end > offset + len(values):
+                values.extend(bytearray(end - offset - len(values)))
+
+            index = position - offset
+            array.size += (values[index] == _UNKNOWN) - (decision == _UNKNOWN)
+            values[index] = decision
+            array.state = (offset, values)
+
+        return True
+
+    def _iter_compact(self):
+        for array_key, array in list(self._arrays.items()):
+            offset, values = array.state
+
+            for index, decision in enumerate(values):
+                if decision != _UNKNOWN:
+                    if array_key is None:
+                        yield (_permissions_by_id[offset + index], None), _DECISIONS[decision]
+                    else:
+                        yield (_permissions_by_id[array_key[0]], (_MODEL_KEY,) + array_key[1:] + (offset + index,)), \
+                            _DECISIONS[decision]
+
+    def clear(self):
+        with self._lock:
+            self._arrays.clear()
+            self._entries.clear()
+
+    def evict(self, predicate):
+        for key, _ in list(self._iter_compact()):
+            if predicate(key):
+                self._set_decision(self._get_location(key), _UNKNOWN)
+
+        super(CompactPermissionCache, self).evict(predicate)
+
+    def keys(self):
+        return [key for key, _ in self._iter_compact()] + super(CompactPermissionCache, self).keys()
+
+    def estimate_size(self):
+        with self._lock:
+            arrays = list(self._arrays.items())
+
+        return super(CompactPermissionCache, self).estimate_size() + sys.getsizeof(self._arrays) + sum(
+            _estimate_key_size(array_key) + sys.getsizeof(array) + sys.getsizeof(array.state) +
+            sys.getsizeof(array.state[1]) for array_key, array in arrays)
+
+    def __len__(self):
+        return sum(array.size for array in list(self._arrays.values())) + len(self._entries)
+
+
+def _hash_key(raw_key):
+    # Hash keys so that they're safe to use with any cache backend,
+    # regardless of the characters used in labels.
+    return hashlib.md5(raw_key.encode('utf-8')).hexdigest()
+
+
+def _new_generation():
+    # Generations start at a random number, so that a generation that was
+    # evicted from the cache doesn't bring back the decisions stored under it.
+    return random.randint(1, 2 ** 30)
+
+
+def _get_labels(permission):
+    labels = set()
+
+    if permission.label is not None:
+        labels.add(permission.label)
+
+    for operand in getattr(permission, 'operands', ()):
+        labels.update(_get_labels(operand))
+
+    return labels
+
+
+def _is_shared_between_users(permission):
+    # Decisions of permissions that don't depend on the user, or that are
+    # cached under a projection of the user, are shared between users.
+    return getattr(permission, 'key', None) is not None or getattr(permission, 'scope', None) == 'object'
+
+
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+class SharedPermissionCache(object):
+    """
+    A second-level permission cache that is shared between requests.
+
+    Decisions are stored in one of Django's configured caches, so that they
+    can be reused by other requests and - depending on the cache backend -
+    by other processes. Only permissions that are registered with the
+    storage under their label, evaluated for users with a primary key, can
+    be stored in the shared cache.
+
+    Every key includes a global generation, a generation of the user and a
+    generation of every labeled permission in the expression. Invalidating
+    decisions increments a generation, so the decisions stored under the old
+    one are never read again and simply expire.
+    """
+
+    def __init__(self, alias, timeout=None, key_prefix='dlp'):
+        """
+        Initialise a new instance of SharedPermissionCache.
+
+        Args:
+            alias (str): The alias of the Django cache to store decisions in.
+            timeout (int): Optional default number of seconds decisions are
+                cached. The cache backend's default is used if it's not set.
+            key_prefix (str): Prefix for all keys stored in the cache.
+        """
+        self.alias = alias
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def _make_generation_key(self, scope, name=''):
+        return '{}:gen:{}:{}'.format(self.key_prefix, scope, _hash_key('{!r}'.format(name)))
+
+    def get_generation_keys(self, permission, user):
+        """
+        Get the keys of the generations that apply to a permission and user.
+
+        Args:
+            permission (BaseLogicalPermission): The permission to evaluate.
+            user (User): The Django User to evaluate the permission on.
+
+        Returns:
+            list: The keys of the global, user and permission generations.
+            Decisions that are shared between users don't depend on the
+            generation of the user.
+        """
+        keys = [self._make_generation_key('global')]
+
+        if not _is_shared_between_users(permission):
+            keys.append(self._make_generation_key('user', user.pk))
+
+        keys.extend(self._make_generation_key('perm', label) for label in sorted(_get_labels(permission)))
+
+        return keys
+
+    def get_generations(self, permission, user):
+        """
+        Get the current generations that apply to a permission and user.
+
+        Generations that don't exist yet are created. Pass the result on to
+        :meth:`get` and :meth:`set`, so that a decision that was made while
+        the generations changed is stored under the old generations.
+
+        Args:
+            permission (BaseLogicalPermission): The permission to evaluate.
+            user (User): The Django User to evaluate the permission on.
+
+        Returns:
+            tuple: The generations or None if the decision can't be shared.
+        """
+        if permission.label is None:
+            return None
+
+        if getattr(user, 'pk', None) is None and not _is_shared_between_users(permission):
+            return None
+
+        keys = self.get_generation_keys(permission, user)
+        generations = self.backend.get_many(keys)
+        missing = [key for key in keys if key not in generations]
+
+        if missing:
+            for key in missing:
+                self.backend.add(key, _new_generation(), None)
+
+            # Another process may have added the generation first.
+            generations.update(self.backend.get_many(missing))
+
+        return tuple(generations.get(key, 0) for key in keys)
+
+    def make_key(self, permission, user, key=None, generations=None):
+        """
+        Build the shared cache key for a permission, user and object key.
+
+        Args:
+            permission (BaseLogicalPermission): The permission to evaluate.
+            user (User): The Django User to evaluate the permission on.
+            key (object): The object key, as returned by the permission's
+                ``cache_key`` method.
+            generations (tuple): The generations returned by
+                :meth:`get_generations`. They're looked up if not given.
+
+        Returns:
+            str: The cache key or None if the decision can't be shared.
+        """
+        if not is_stable_key(key):
+            return None
+
+        if generations is None:
+            generations = self.get_generations(permission, user)
+
+            if generations is None:
+                return None
+
+        user_pk = None if _is_shared_between_users(permission) else user.pk
+        raw_key = '{}:{!r}:{!r}:{}'.format(
+            permission.label, user_pk, key, '.'.join(str(generation) for generation in generations))
+
+        return '{}:{}'.format(self.key_prefix, _hash_key(raw_key))
+
+    def get(self, permission, user, key=None, default=MISSING, generations=None, refresh=None):
+        """
+        Get a cached decision.
+
+        Decisions of permissions with a ``stale_grace`` are still returned
+        for that many seconds after they expired. The first time a stale
+        decision is returned, ``refresh`` is called in the background to
+        store a new decision.
+
+        Args:
+            permission (BaseLogicalPermission): The permission to evaluate.
+            user (User): The Django User to evaluate the permission on.
+            key (object): The object key of the decision.
+            default: Value to return if there is no cached decision.
+            generations (tuple): Optional generations to use.
+            refresh (callable): Optional function without arguments that
+                evaluates the permission again.
+
+        Returns:
+            bool: The cached decision or ``default`` if there is none.
+        """
+        shared_key = self.make_key(permission, user, key, generations)
+
+        if shared_key is None:
+            return default
+
+        value = self.backend.get(shared_key, default)
+
+        # Decisions that may be served stale are stored with the time they
+        # expire at.
+        if isinstance(value, tuple):
+            value, expires_at = value
+
+            if expires_at <= time.time() and refresh is not None:
+                self._refresh(permission, shared_key, refresh)
+
+        return value
+
+    def set(self, permission, user, key, value, generations=None):
+        """
+        Store a decision in the cache.
+
+        The permission's ``shared_cache_ttl`` or else its ``ttl`` takes
+        priority over the default timeout of this cache.
+
+        Args:
+            permission (BaseLogicalPermission): The evaluated permission.
+            user (User): The Django User the permission was evaluated on.
+            key (object): The object key of the decision.
+            value (bool): The decision to store.
+            generations (tuple): Optional generations to use, normally the
+                ones the decision was looked up with.
+        """
+        shared_key = self.make_key(permission, user, key, generations)
+
+        if shared_key is not None:
+            self._store(permission, shared_key, value)
+
+    def _store(self, permission, shared_key, value):
+        timeout = permission.shared_cache_ttl
+
+        if timeout is None:
+            timeout = permission.ttl
+
+        if timeout is None:
+            timeout = self.timeout
+
+        if timeout is None:
+            self.backend.set(shared_key, value)
+        elif permission.stale_grace:
+            self.backend.set(shared_key, (value, time.time() + timeout), timeout + permission.stale_grace)
+        else:
+            self.backend.set(shared_key, value, timeout)
+
+    def _refresh(self, permission, shared_key, refresh):
+        from .parallel import submit
+
+        with _refreshing_lock:
+            if shared_key in _refreshing:
+                return
+
+            _refreshing.add(shared_key)
+
+        # Only a single process refreshes the decision. The lock expires
+        # along with the stale decision, in case the refresh never finishes.
+        lock_key = '{}:refresh'.format(shared_key)
+
+        if not self.backend.add(lock_key, True, permission.stale_grace):
+            with _refreshing_lock:
+                _refreshing.discard(shared_key)
+
+            return
+
+        submitted = False
+
+        try:
+            submit(self._run_refresh, permission, shared_key, refresh, lock_key)
+            submitted = True
+        finally:
+            # Once it's submitted, the refresh cleans up after itself.
+            if not submitted:
+                self.backend.delete(lock_key)
+
+                with _refreshing_lock:
+                    _refreshing.discard(shared_key)
+
+    def _run_refresh(self, permission, shared_key, refresh, lock_key):
+        try:
+            self._store(permission, shared_key, refresh())
+        except Exception:
+            # Nobody waits for the outcome of the refresh, so the error would
+            # go unnoticed otherwise. The stale decision is served until the
+            # next refresh or until it expires.
+            logger.exception('Refreshing the decision of %r failed.', permission)
+        finally:
+            self.backend.delete(lock_key)
+
+            with _refreshing_lock:
+                _refreshing.discard(shared_key)
+
+    def _increment(self, generation_key):
+        try:
+            self.backend.incr(generation_key)
+        except ValueError:
+            # The generation doesn't exist (anymore), so start a new one.
+            self.backend.add(generation_key, _new_generation(), None)
+
+    def invalidate_user(self, user):
+        """
+        Invalidate all shared decisions of a user.
+
+        Args:
+            user (User): The user to invalidate the decisions of.
+        """
+        if getattr(user, 'pk', None) is not None:
+            self._increment(self._make_generation_key('user', user.pk))
+
+    def invalidate_permission(self, label):
+        """
+        Invalidate all shared decisions of a permission and the permissions containing it.
+
+        Args:
+            label (str): The label of the permission.
+        """
+        self._increment(self._make_generation_key('perm', label))
+
+    def invalidate_all(self):
+        """
+        Invalidate all shared decisions.
+        """
+        self._increment(self._make_generation_key('global'))
+
+
+_live_caches = weakref.WeakSet()
+_live_caches_lock = threading.Lock()
+
+_watched_models = defaultdict(set)
+
+
+def create_cache(owner=None):
+    """
+    Create a new, empty permission cache according to the settings.
+
+    The cache is tracked, so that its decisions can be invalidated through
+    :func:`invalidate`, for as long as it's in use.
+
+    Args:
+        owner: Optional key of the user the cache belongs to.
+
+    Returns:
+        BasePermissionCache: The new cache instance.
+    """
+    cache_class = getattr(settings, 'PERMISSIONS_CACHE_CLASS', 'django_logical_perms.caches.LRUPermissionCache')
+
+    if not callable(cache_class):
+        cache_class = import_string(cache_class)
+
+    cache = cache_class(
+        max_size=getattr(settings, 'PERMISSIONS_CACHE_MAX_SIZE', None),
+        ttl=getattr(settings, 'PERMISSIONS_CACHE_TTL', None))
+    cache.owner = owner
+
+    with _live_caches_lock:
+        _live_caches.add(cache)
+
+    return cache
+
+
+def _get_live_caches():
+    with _live_caches_lock:
+        return list(_live_caches)
+
+
+def _contains_permission(permission, target, memo):
+    result = memo.get(permission)
+
+    if result is None:
+        result = memo[permission] = permission is target or any(
+            _contains_permission(operand, target, memo) for operand in getattr(permission, 'operands', ()))
+
+    return result
+
+
+def invalidate(user=None, permission=None, obj=None):
+    """
+    Remove cached decisions from the caches of all users in this process.
+
+    The arguments narrow down the decisions to remove. Without any arguments,
+    all cached decisions are removed. Decisions of combined permissions that
+    contain the given permission are removed as well.
+
+    If the shared cache is enabled, the generation of the user, or else of
+    the permission, or else the global generation is incremented. Shared
+    decisions can't be removed for a single object, so all shared decisions
+    of the user or permission are invalidated.
+
+    Example:
+        >>> invalidate(user=user)
+        >>> invalidate(permission=user_can_edit_project, obj=project)
+
+    Args:
+        user (User): Optional user to remove the decisions of. This includes
+            the decisions cached for other instances of the same user.
+        permission (BaseLogicalPermission): Optional permission to remove
+            the decisions of.
+        obj (object): Optional object to remove the decisions for.
+    """
+    shared_cache = get_shared_cache()
+
+    if shared_cache is not None:
+        if user is not None:
+            shared_cache.invalidate_user(user)
+        elif permission is not None:
+            if permission.label is not None:
+                shared_cache.invalidate_permission(permission.label)
+        else:
+            shared_cache.invalidate_all()
+
+    if user is None:
+        caches_to_invalidate = _get_live_caches()
+    else:
+        owner = get_object_key(user)
+
+        # Unsaved users can't be told apart, so only their own cache is used.
+        if owner is UNCACHEABLE:
+            caches_to_invalidate = [get_user_cache(user)]
+        else:
+            caches_to_invalidate = [cache for cache in _get_live_caches() if cache.owner == owner]
+
+    if permission is None and obj is None:
+        for cache in caches_to_invalidate:
+            cache.clear()
+
+        return
+
+    obj_key = None if obj is None else get_object_key(obj)
+    memo = {}
+
+    def predicate(key):
+        cached_permission, cached_obj_key = key
+
+        if obj is not None and cached_obj_key != obj_key:
+            return False
+
+        return permission is None or _contains_permission(cached_permission, permission, memo)
+
+    for cache in caches_to_invalidate:
+        cache.evict(predicate)
+
+
+def get_model_label(model):
+    """
+    Get the lowercase ``app_label.model_name`` label of a model.
+
+    Args:
+        model (Model, str): A model class or its label.
+
+    Returns:
+        str: The label of the model.
+    """
+    if not hasattr(model, '_meta'):
+        return model.lower()
+
+    return '{}.{}'.format(model._meta.app_label, model._meta.model_name)
+
+
+def watch_models(models, label=None):
+    """
+    Evict decisions when instances of the given models change.
+
+    See :func:`evict_dependent_decisions`.
+
+    Args:
+        models (iterable): Model classes or labels.
+        label (str): Optional label of the permission that depends on the
+            models. Its shared decisions are invalidated as well.
+    """
+    for model in models:
+        labels = _watched_models[get_model_label(model)]
+
+        if label is not None:
+            labels.add(label)
+
+
+def evict_dependent_decisions(sender, **kwargs):
+    """
+    Signal receiver that evicts the decisions of permissions depending on the changed model.
+
+    The receiver is connected to the ``post_save``, ``post_delete`` and
+    ``m2m_changed`` signals. Permissions declare the models they depend on
+    through their ``depends_on`` attribute. Besides the caches of this
+    process, the shared decisions of the labeled permissions that depend on
+    the model are invalidated.
+
+    Args:
+        sender (Model): The model class that sent the signal.
+        **kwargs: The arguments of the signal.
+    """
+    action = kwargs.get('action')
+
+    if action is not None and not action.startswith('post_'):
+        return
+
+    models = [sender, type(kwargs.get('instance'))]
+
+    if kwargs.get('model') is not None:
+        models.append(kwargs['model'])
+
+    labels = set(get_model_label(model) for model in models if hasattr(model, '_meta'))
+    labels.intersection_update(_watched_models)
+
+    if not labels:
+        return
+
+    shared_cache = get_shared_cache()
+
+    if shared_cache is not None:
+        for permission_label in set().union(*(_watched_models[label] for label in labels)):
+            shared_cache.invalidate_permission(permission_label)
+
+    memo = {}
+
+    def predicate(key):
+        permission = key[0]
+        result = memo.get(permission)
+
+        if result is None:
+            depends_on = getattr(permission, 'depends_on', ())
+            result = memo[permission] = not labels.isdisjoint(get_model_label(model) for model in depends_on)
+
+        return result
+
+    for cache in _get_live_caches():
+        cache.evict(predicate)
+
+
+class _ThreadLocalVar(object):
+    """
+    A minimal stand-in for ``ContextVar`` on Python versions without contextvars.
+    """
+
+    def __init__(self, name, default=None):
+        self.name = name
+        self.default = default
+        self._local = threading.local()
+
+    def get(self):
+        return getattr(self._local, 'value', self.default)
+
+    def set(self, value):
+        token = self.get()
+        self._local.value = value
+        return token
+
+    def reset(self, token):
+        self._local.value = token
+
+
+if ContextVar is not None:
+    _current_scope = ContextVar('django_logical_perms_cache_scope', default=None)
+else:  # pragma: no cover
+    _current_scope = _ThreadLocalVar('django_logical_perms_cache_scope', default=None)
+
+
+class PermissionCacheScope(object):
+    """
+    Holds the permission caches of all users that are evaluated within a scope.
+
+    A scope is entered through :func:`permission_cache_scope`. Users that have
+    been saved to the database share their cache within the scope, even if
+    they were fetched more than once.
+    """
+
+    def __init__(self):
+        self._caches = {}
+
+    def _get_user_key(self, user):
+        pk = getattr(user, 'pk', None)
+
+        if pk is None:
+            return id(user)
+
+        return type(user), pk
+
+    def get_cache(self, user):
+        """
+        Get the permission cache of the given user within this scope.
+
+        Args:
+            user (User): The Django User the cache belongs to.
+
+        Returns:
+            BasePermissionCache: The user's permission cache.
+        """
+        key = self._get_user_key(user)
+        entry = self._caches.get(key)
+
+        if entry is None:
+            # The user is kept alongside its cache so that its id can't be
+            # reused by another user while the scope is active.
+            entry = self._caches.setdefault(key, (user, create_cache(owner=get_object_key(user))))
+
+        return entry[1]
+
+    def get_shared_cache(self):
+        """
+        Get the cache of decisions that are shared between all users in this scope.
+
+        Returns:
+            BasePermissionCache: The cache of decisions that only depend on
+            the object.
+        """
+        entry = self._caches.get(None)
+
+        if entry is None:
+            entry = self._caches.setdefault(None, (None, create_cache()))
+
+        return entry[1]
+
+    def clear(self):
+        """
+        Drop the permission caches of all users in this scope.
+        """
+        self._caches.clear()
+
+    def __len__(self):
+        return len(self._caches)
+
+
+def get_current_scope():
+    """
+    Get the permission cache scope of the current context.
+
+    Returns:
+        PermissionCacheScope: The scope or None if no scope was entered.
+    """
+    return _current_scope.get()
+
+
+@contextmanager
+def permission_cache_scope():
+    """
+    Evaluate permissions with caches that only live as long as this context.
+
+    Within the scope, decisions aren't cached on the user objects but in
+    caches that belong to the scope. The scope follows the current context:
+    it's local to the current thread or asyncio task and is passed on to the
+    threads of parallel permissions. Once the context manager exits, all
+    decisions made in it are dropped. Scopes can be nested, in which case
+    the inner scope starts out empty.
+
+    Example:
+        >>> for job in jobs:
+        ...     with permission_cache_scope():
+        ...         process(job)
+
+    Yields:
+        PermissionCacheScope: The new scope.
+    """
+    scope = PermissionCacheScope()
+    token = _current_scope.set(scope)
+
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+
+
+def get_user_cache(user):
+    """
+    Get the permission cache of the given user.
+
+    Within a :func:`permission_cache_scope`, the cache of the current scope
+    is returned. Otherwise the cache is attached to the user on first use.
+    As with Django's own permission caches, re-fetching the user will start
+    out with an empty cache.
+
+    Args:
+        user (User): The Django User the cache belongs to.
+
+    Returns:
+        BasePermissionCache: The user's permission cache.
+    """
+    scope = _current_scope.get()
+
+    if scope is not None:
+        return scope.get_cache(user)
+
+    user_dict = vars(user)
+    cache = user_dict.get('_dlp_cache')
+
+    if cache is None:
+        # Use setdefault so that threads which share the user object all end
+        # up with the same cache.
+        cache = user_dict.setdefault('_dlp_cache', create_cache(owner=get_object_key(user)))
+
+    return cache
+
+
+def _iter_object_references(key):
+    if isinstance(key, tuple):
+        for item in key:
+            for reference in _iter_object_references(item):
+                yield reference
+    elif not isinstance(key, _STABLE_TYPES) and key is not _MODEL_KEY:
+        yield key
+
+
+def _has_dead_reference(key):
+    return any(
+        isinstance(reference, WeakObjectKey) and not reference.alive for reference in _iter_object_references(key))
+
+
+def get_cache_report(user):
+    """
+    Report on the memory used by the permission cache of a user.
+
+    Example:
+        >>> get_cache_report(user)
+        {'entries': 3, 'bytes': 824, 'strong_references': 1, 'weak_references': 0, 'dead_references': 0}
+
+    Args:
+        user (User): The Django User the cache belongs to.
+
+    Returns:
+        dict: The number of cached decisions and their estimated size in
+        bytes, as well as the number of objects that the cache keys refer to:
+        strongly (keeping them alive), weakly, or weakly to objects that have
+        been garbage collected already.
+    """
+    cache = get_user_cache(user)
+    strong = weak = dead = 0
+
+    for key in cache.keys():
+        # Keys consist of the permission and the key derived for the object.
+        for reference in _iter_object_references(key[1:]):
+            if not isinstance(reference, WeakObjectKey):
+                strong += 1
+            elif reference.alive:
+                weak += 1
+            else:
+                dead += 1
+
+    return {
+        'entries': len(cache),
+        'bytes': cache.estimate_size(),
+        'strong_references': strong,
+        'weak_references': weak,
+        'dead_references': dead,
+    }
+
+
+def get_shared_cache():
+    """
+    Get the shared permission cache, if it's enabled in the settings.
+
+    Returns:
+        SharedPermissionCache: The shared cache or None if the
+        ``PERMISSIONS_SHARED_CACHE`` setting is not set.
+    """
+    alias = getattr(settings, 'PERMISSIONS_SHARED_CACHE', None)
+
+    if alias is None:
+        return None
+
+    return SharedPermissionCache(alias, timeout=getattr(settings, 'PERMISSIONS_SHARED_CACHE_TTL', None))
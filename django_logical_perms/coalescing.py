@@ -0,0 +1,147 @@
+import threading
+
+from django.conf import settings
+
+from .caches import get_object_key, UNCACHEABLE
+from .exceptions import EvaluationTimeout
+
+try:
+    from ._async import AsyncSingleFlightMixin
+except SyntaxError:  # pragma: no cover
+    # Coroutines are not supported on Python 2.
+    AsyncSingleFlightMixin = object
+
+
+class _Call(object):
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight(AsyncSingleFlightMixin):
+    """
+    Coalesces concurrent calls that share the same key into a single call.
+
+    The first caller of a key runs the function. Other callers of the same
+    key that arrive while it's running wait for it and get its outcome,
+    including any exception it raised, instead of running the function
+    themselves. Threads and asyncio tasks are coalesced separately.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Call a function, unless a call with the same key is already running.
+
+        Args:
+            key (object): Hashable key that identifies identical calls.
+            func (callable): The function to call.
+            *args: The arguments to call the function with.
+            timeout (float): Optional number of seconds to wait for the
+                running call. Waits indefinitely if it's not set.
+
+        Returns:
+            The outcome of the (coalesced) call.
+
+        Raises:
+            EvaluationTimeout: If the running call didn't finish in time.
+        """
+        timeout = kwargs.pop('timeout', None)
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if leader:
+            try:
+                call.result = func(*args)
+            except Exception as error:
+                call.error = error
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+
+                call.event.set()
+
+            return call.result
+
+        if not call.event.wait(timeout):
+            raise EvaluationTimeout('Timed out waiting for the evaluation of {!r}.'.format(key))
+
+        if call.error is not None:
+            raise call.error
+
+        return call.result
+
+    def get_waiters(self, key):
+        """
+        Get the number of callers that joined the running call with the given key.
+
+        Args:
+            key (object): Hashable key that identifies identical calls.
+
+        Returns:
+            int: The number of callers, or 0 if no call is running.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+
+        return 0 if call is None else call.waiters
+
+    def __len__(self):
+        return len(self._calls) + len(self._async_calls)
+
+
+default_single_flight = SingleFlight()
+"""SingleFlight: Coalesces the evaluations of permissions in this process."""
+
+
+def get_single_flight():
+    """
+    Get the single flight that coalesces evaluations, if it's enabled in the settings.
+
+    Returns:
+        SingleFlight: The single flight or None if the
+        ``PERMISSIONS_COALESCE_EVALUATIONS`` setting is disabled.
+    """
+    if not getattr(settings, 'PERMISSIONS_COALESCE_EVALUATIONS', False):
+        return None
+
+    return default_single_flight
+
+
+def get_coalescing_key(permission, user, key):
+    """
+    Get the key that identifies identical evaluations of a permission.
+
+    Args:
+        permission (BaseLogicalPermission): The permission to evaluate.
+        user (User): The Django User to evaluate the permission on.
+        key (object): The object key, as returned by the permission's
+            ``cache_key`` method.
+
+    Returns:
+        tuple: The key or None if the evaluation can't be coalesced.
+    """
+    user_key = get_object_key(user)
+
+    if user_key is UNCACHEABLE:
+        return None
+
+    return permission, user_key, key
+
+
+def get_coalescing_timeout():
+    return getattr(settings, 'PERMISSIONS_COALESCE_TIMEOUT', None)
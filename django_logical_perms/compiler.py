@@ -0,0 +1,225 @@
+from collections import Counter
+
+from django.conf import settings
+
+from .exceptions import CompiledPermissionMismatch
+from .permissions import AllOf, AnyOf, AtLeast, Not, XorOf
+
+
+class PermissionCompiler(object):
+    """
+    Compiles a composite permission into a single generated function.
+
+    Every :class:`~django_logical_perms.permissions.AnyOf`,
+    :class:`~django_logical_perms.permissions.AllOf`,
+    :class:`~django_logical_perms.permissions.XorOf`,
+    :class:`~django_logical_perms.permissions.AtLeast` and
+    :class:`~django_logical_perms.permissions.Not` node in the expression is
+    inlined, including its short-circuit logic. Any other permission is a leaf
+    and is evaluated through its (cached) ``test`` method, as are nodes that
+    are evaluated in parallel. Subexpressions that
+    occur more than once are evaluated at most once per call.
+    """
+
+    def __init__(self, permission):
+        """
+        Initialise a new instance of PermissionCompiler.
+
+        Args:
+            permission (CompositeLogicalPermission): The permission to compile.
+        """
+        self.permission = permission
+        self._emitters = {
+            AnyOf: self._emit_any_of,
+            AllOf: self._emit_all_of,
+            XorOf: self._emit_xor_of,
+            AtLeast: self._emit_at_least,
+            Not: self._emit_not,
+        }
+        self._namespace = {}
+        self._leaves = {}
+        self._memos = {}
+        self._counter = 0
+
+    def _is_inlined(self, node):
+        return type(node) in self._emitters and not node.parallel
+
+    def _signature(self, node):
+        """
+        Get a structural signature of a node, used to find shared subexpressions.
+        """
+        if not self._is_inlined(node):
+            return 'leaf', id(node)
+
+        return (type(node), getattr(node, 'count', None)) + tuple(
+            self._signature(operand) for operand in node.operands)
+
+    def _count_signatures(self, node, counter):
+        signature = self._signature(node)
+        counter[signature] += 1
+
+        # Only descend into the first occurrence of a subexpression, as any
+        # other occurrence will reuse its memoized outcome.
+        if counter[signature] == 1 and self._is_inlined(node):
+            for operand in node.operands:
+                self._count_signatures(operand, counter)
+
+    def _new_name(self, prefix):
+        self._counter += 1
+        return '_{}{}'.format(prefix, self._counter)
+
+    def _emit(self, node, target, lines, indent):
+        """
+        Emit the code that evaluates ``node`` into the variable ``target``.
+        """
+        pad = '    ' * indent
+        signature = self._signature(node)
+
+        # Shared subexpressions are evaluated once and memoized.
+        if signature in self._memos:
+            memo = self._memos[signature]
+            lines.append('{}if {} is None:'.format(pad, memo))
+            self._emit_node(node, memo, lines, indent + 1)
+            lines.append('{}{} = {}'.format(pad, target, memo))
+        else:
+            self._emit_node(node, target, lines, indent)
+
+    def _emit_node(self, node, target, lines, indent):
+        if self._is_inlined(node):
+            self._emitters[type(node)](node, target, lines, indent)
+            return
+
+        name = self._leaves.get(id(node))
+
+        if name is None:
+            name = self._leaves[id(node)] = self._new_name('p')
+            self._namespace[name] = node.test
+
+        lines.append('{}{} = not not {}(user, obj)'.format('    ' * indent, target, name))
+
+    def _emit_short_circuit(self, node, target, lines, indent, stop_on):
+        pad = '    ' * indent
+        lines.append('{}{} = {}'.format(pad, target, not stop_on))
+        lines.append('{}while True:'.format(pad))
+
+        for operand in node.operands:
+            self._emit(operand, target, lines, indent + 1)
+            lines.append('{}    if {}{}:'.format(pad, '' if stop_on else 'not ', target))
+            lines.append('{}        break'.format(pad))
+
+        lines.append('{}    break'.format(pad))
+
+    def _emit_any_of(self, node, target, lines, indent):
+        self._emit_short_circuit(node, target, lines, indent, stop_on=True)
+
+    def _emit_all_of(self, node, target, lines, indent):
+        self._emit_short_circuit(node, target, lines, indent, stop_on=False)
+
+    def _emit_xor_of(self, node, target, lines, indent):
+        pad = '    ' * indent
+        operand_target = self._new_name('t')
+        lines.append('{}{} = False'.format(pad, target))
+
+        for operand in node.operands:
+            self._emit(operand, operand_target, lines, indent)
+            lines.append('{}if {}:'.format(pad, operand_target))
+            lines.append('{}    {} = not {}'.format(pad, target, target))
+
+    def _emit_at_least(self, node, target, lines, indent):
+        pad = '    ' * indent
+        granted, remaining = self._new_name('g'), self._new_name('r')
+        operand_target = self._new_name('t')
+
+        lines.append('{}{}, {} = 0, {}'.format(pad, granted, remaining, len(node.operands)))
+        lines.append('{}while True:'.format(pad))
+
+        for operand in node.operands:
+            lines.append('{}    if {g} >= {c} or {g} + {r} < {c}:'.format(pad, g=granted, r=remaining, c=node.count))
+            lines.append('{}        break'.format(pad))
+            lines.append('{}    {} -= 1'.format(pad, remaining))
+            self._emit(operand, operand_target, lines, indent + 1)
+            lines.append('{}    if {}:'.format(pad, operand_target))
+            lines.append('{}        {} += 1'.format(pad, granted))
+
+        lines.append('{}    break'.format(pad))
+        lines.append('{}{} = {} >= {}'.format(pad, target, granted, node.count))
+
+    def _emit_not(self, node, target, lines, indent):
+        self._emit(node.operand, target, lines, indent)
+        lines.append('{}{} = not {}'.format('    ' * indent, target, target))
+
+    def get_source(self):
+        """
+        Generate the source code of the compiled function.
+
+        Returns:
+            str: Source code defining a ``compiled_permission`` function.
+        """
+        counter = Counter()
+        self._count_signatures(self.permission, counter)
+
+        # The root node is evaluated once anyway, so it doesn't need a memo.
+        root_signature = self._signature(self.permission)
+
+        for signature, count in counter.items():
+            if count > 1 and signature != root_signature:
+                self._memos[signature] = self._new_name('m')
+
+        lines = []
+        self._emit(self.permission, '_result', lines, 1)
+
+        header = ['def compiled_permission(user, obj=None):']
+        header.extend('    {} = None'.format(memo) for memo in sorted(self._memos.values()))
+
+        return '\n'.join(header + lines + ['    return _result', ''])
+
+    def compile(self):
+        """
+        Compile the permission.
+
+        Returns:
+            callable: A function with the same signature and outcome as the
+            permission's ``has_permission`` method.
+        """
+        source = self.get_source()
+        namespace = dict(self._namespace)
+
+        exec(compile(source, '<compiled {!r}>'.format(self.permission), 'exec'), namespace)
+
+        return namespace['compiled_permission']
+
+
+def compile_permission(permission):
+    """
+    Compile a composite permission into a single function.
+
+    If the ``PERMISSIONS_COMPILE_VERIFY`` setting is enabled, the compiled
+    function also evaluates the permission the interpreted way and raises
+    :class:`~django_logical_perms.exceptions.CompiledPermissionMismatch` when
+    the outcomes differ.
+
+    Args:
+        permission (CompositeLogicalPermission): The permission to compile.
+
+    Returns:
+        callable: The compiled ``has_permission`` replacement.
+    """
+    compiled = PermissionCompiler(permission).compile()
+
+    if not getattr(settings, 'PERMISSIONS_COMPILE_VERIFY', False):
+        return compiled
+
+    interpreted = type(permission).has_permission.__get__(permission)
+
+    def verified_permission(user, obj=None):
+        result = compiled(user, obj)
+        expected = interpreted(user, obj)
+
+        if result != bool(expected):
+            raise CompiledPermissionMismatch(
+                'The compiled version of {!r} evaluated to {} while {} was expected.'.format(
+                    permission, result, expected))
+
+        return result
+
+    return verified_permission
@@ -67,6 +67,24 @@ class FieldPermissionConfig(object):
 
         return perm
 
+    def prefetch(self, action, user, objs):
+        """
+        Evaluate the permission of the given action for many objects at once.
+
+        The decisions end up in the user's permission cache, so that
+        ``can_view`` and ``can_change`` don't have to evaluate the permission
+        for those objects anymore.
+
+        Args:
+            action (str): Either 'view' or 'change'.
+            user (User): A User instance to check the permission against.
+            objs (list): The objects to check the permission against.
+        """
+        perm = getattr(self, '_can_{}_perm'.format(action))
+
+        if isinstance(perm, BaseLogicalPermission):
+            perm.test_many(user, objs)
+
     def can_change(self, user, obj=None):
         """
         Check change permission for the given user and optional object.
@@ -158,6 +176,23 @@ class FieldPermissionConfigSet(object):
                 for field_name in config.fields:
                     yield field_name
 
+    def prefetch(self, action, user, objs):
+        """
+        Evaluate the dynamic permissions of the given action for many objects at once.
+
+        Call this before checking the permitted fields of each object, so that
+        every permission is evaluated in bulk instead of once per object.
+
+        Args:
+            action (str): Action to check permission against.
+            user (User): A User instance to check the permission against.
+            objs (list): The objects to check the permissions against.
+        """
+        self._validate_action(action)
+
+        for config in self.field_config:
+            config.prefetch(action, user, objs)
+
     def get_permitted_field_names(self, action, user, obj=None):
         """
         Get a list of all permitted fields.
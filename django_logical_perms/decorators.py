@@ -6,7 +6,9 @@ from .permissions import FunctionalLogicalPermission
 from .storages import default_storage
 
 
-def permission(func=None, label=None, register=None):
+def permission(
+        func=None, label=None, register=None, order_sensitive=False, as_q=None, reads_object=True, depends_on=None,
+        stale_grace=None, cache='shared', ttl=None, key=None, scope=None):
     """
     Decorator for turning an ordinary function into a permission.
 
@@ -17,12 +19,46 @@ def permission(func=None, label=None, register=None):
         register (bool): Optional, whether to automatically register the
             permission with the authentication backend. If it's not set, the
             default settings will be used.
+        order_sensitive (bool): Optional, whether the permission has side
+            effects. The position of order-sensitive permissions among
+            combined permissions is never changed by operand ordering.
+        as_q (callable): Optional function that takes a user and returns a
+            Q object matching the objects the permission grants access to.
+            This enables filtering querysets with the permission.
+        reads_object (bool): Optional, whether the outcome depends on the
+            object. Permissions that only check the user can be evaluated
+            once when binding a permission to a user. Setting it to False is
+            a shorthand for the ``'user'`` scope.
+        depends_on (iterable): Optional models (or their labels) the outcome
+            depends on. Saving or deleting their instances evicts the cached
+            decisions of the permission.
+        stale_grace (int): Optional number of seconds an expired decision in
+            the shared cache may still be used. The first request that gets
+            the stale decision refreshes it in the background.
+        cache (str): Optional, where decisions are cached. ``'shared'`` (the
+            default) caches them per user and in the shared cache if it's
+            enabled, ``'request'`` only caches them per user and None doesn't
+            cache them at all, e.g. for cheap permissions.
+        ttl (int): Optional number of seconds decisions stay cached.
+        key (callable): Optional function that takes a user and an object and
+            returns the inputs of the decision, such as
+            ``lambda user, obj: (user.org_id, obj.project_id)``. Decisions are
+            cached under this key, and the shared decisions are shared between
+            all users with the same key.
+        scope (str): Optional, what the outcome depends on: ``'user'``,
+            ``'object'`` or ``'user+object'`` (the default). Decisions of
+            ``'user'`` permissions are cached once for all objects, and
+            decisions of ``'object'`` permissions are shared between users.
 
     Raises:
-        ValueError: If ``func`` is not a callable
+        ValueError: If ``func`` is not a callable or the ``cache`` policy or
+            ``scope`` is not supported.
     """
     if func is None:
-        return partial(permission, label=label, register=register)
+        return partial(
+            permission, label=label, register=register, order_sensitive=order_sensitive, as_q=as_q,
+            reads_object=reads_object, depends_on=depends_on, stale_grace=stale_grace,
+            cache=cache, ttl=ttl, key=key, scope=scope)
 
     # The thing that we're decorating should at least be a callable.
     if not callable(func):
@@ -38,7 +74,10 @@ def permission(func=None, label=None, register=None):
     @wraps(func)
     def actual_decorator():
         # Create the actual permission object
-        instance = FunctionalLogicalPermission(check_func=func, label=label)
+        instance = FunctionalLogicalPermission(
+            check_func=func, label=label, order_sensitive=order_sensitive, as_q=as_q,
+            reads_object=reads_object, depends_on=depends_on, stale_grace=stale_grace,
+            cache=cache, ttl=ttl, key=key, scope=scope)
 
         # Register with the default storage if specified
         if register is True:
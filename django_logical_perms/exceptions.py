@@ -1,2 +1,14 @@
 class PermissionNotFound(Exception):
     pass
+
+
+class CompiledPermissionMismatch(Exception):
+    pass
+
+
+class PermissionNotTranslatable(Exception):
+    pass
+
+
+class EvaluationTimeout(Exception):
+    pass
@@ -1,7 +1,24 @@
-from importlib import import_module
+import json
+import os
+import time
+from collections import namedtuple
 
 from django.apps import apps
 from django.conf import settings
+from django.utils.module_loading import module_has_submodule
+
+from .storages import default_storage
+
+try:
+    from importlib.util import find_spec
+except ImportError:  # pragma: no cover
+    # Python 2 doesn't have find_spec.
+    find_spec = None
+
+_timer = getattr(time, 'perf_counter', time.time)
+
+PermissionsModuleLoad = namedtuple('PermissionsModuleLoad', ('app_config', 'success', 'duration', 'count'))
+"""namedtuple: The outcome of loading the permissions module of an app."""
 
 
 def load_all_permissions_modules(yield_loads=False):
@@ -13,38 +30,117 @@ def load_all_permissions_modules(yield_loads=False):
     evaluation through Django's has_perms function (if the custom auth
     backend is loaded).
 
-    Yields:
-        (AppConfig, bool): A tuple representing the app's AppConfig
-        module and whether its permissions module was successfully loaded.
+    Args:
+        yield_loads (bool): Whether to return an iterator over the loads. The
+            modules are loaded while iterating over it. If it's not set, all
+            modules are loaded immediately.
+
+    Returns:
+        iterator: Yields a :data:`PermissionsModuleLoad` for every app: the
+        app's AppConfig, whether its permissions module was successfully
+        loaded, the number of seconds importing it took and the number of
+        permissions it registered. Modules that were loaded before take no
+        time and count the permissions they registered then. Nothing is
+        yielded if ``yield_loads`` is not set.
     """
+    loads = _iterate_permissions_module_loads()
+
+    if yield_loads:
+        return loads
+
+    for _ in loads:
+        pass
+
+    return iter(())
+
+
+def _iterate_permissions_module_loads():
     from django_logical_perms.apps import DjangoLogicalPermsConfig
 
     for _, app_config in apps.app_configs.items():
         if not isinstance(app_config, DjangoLogicalPermsConfig):
-            success = load_permissions_module(app_config)
+            start = _timer()
+            loaded = _load_permissions_module(app_config)
 
-            if yield_loads:
-                yield app_config, success
+            yield PermissionsModuleLoad(
+                app_config, loaded is not None, _timer() - start, len(loaded) if loaded is not None else 0)
+
+
+def get_permissions_module_path(app_config):
+    """
+    Get the dotted path of the permissions module of an app.
+
+    Args:
+        app_config (AppConfig): The app's :class:`AppConfig` instance.
+
+    Returns:
+        str: The path, whether the module exists or not.
+    """
+    permissions_module_name = getattr(settings, 'PERMISSIONS_MODULE_NAME', 'permissions')
+    return '%s.%s' % (app_config.name, permissions_module_name)
+
+
+def has_permissions_module(app_config):
+    """
+    Check whether an app has a permissions module, without importing it.
+
+    Args:
+        app_config (AppConfig): The app's :class:`AppConfig` instance.
+
+    Returns:
+        bool: True if the app has a permissions module.
+    """
+    # Apps that are a single module can't have submodules.
+    if not hasattr(app_config.module, '__path__'):
+        return False
+
+    if find_spec is None:  # pragma: no cover
+        return module_has_submodule(app_config.module, getattr(settings, 'PERMISSIONS_MODULE_NAME', 'permissions'))
+
+    return find_spec(get_permissions_module_path(app_config)) is not None
 
 
 def load_permissions_module(app_config):
     """
     Loads the permissions module for the given app.
 
+    Errors raised while importing an existing permissions module are not
+    caught.
+
     Args:
         app_config (AppConfig): The app's :class:`AppConfig` instance.
 
     Returns:
-        bool: True if the permissions module could be imported successfully.
+        bool: True if the permissions module could be imported successfully,
+        False if the app doesn't have a permissions module.
     """
-    try:
-        # Import and only process apps with a permissions module.
-        permissions_module_name = getattr(settings, 'PERMISSIONS_MODULE_NAME', 'permissions')
-        permissions_module_path = '%s.%s' % (app_config.name, permissions_module_name)
+    return _load_permissions_module(app_config) is not None
 
-        import_module(permissions_module_path)
 
-        return True
-    except ImportError:
-        # Skip the app if the permissions module does not exist.
-        return False
+def _load_permissions_module(app_config):
+    # Skip the app if the permissions module does not exist.
+    if not has_permissions_module(app_config):
+        return None
+
+    return default_storage.load_module(get_permissions_module_path(app_config))
+
+
+def read_manifest():
+    """
+    Read the manifest that ``PERMISSIONS_MANIFEST`` points to.
+
+    The manifest is written by the ``permissions_manifest`` management
+    command and maps the labels of permissions onto the modules that
+    register them.
+
+    Returns:
+        dict: The dotted paths of the permissions modules by permission
+        label, or None if the setting isn't set or the file doesn't exist.
+    """
+    path = getattr(settings, 'PERMISSIONS_MANIFEST', None)
+
+    if path is None or not os.path.exists(path):
+        return None
+
+    with open(path) as manifest_file:
+        return json.load(manifest_file)
@@ -0,0 +1,34 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from django_logical_perms.loaders import load_all_permissions_modules
+from django_logical_perms.storages import default_storage
+
+
+class Command(BaseCommand):
+    help = (
+        'Writes a manifest of the modules that register logical permissions. Point the PERMISSIONS_MANIFEST setting '
+        'to it to import permissions modules only when their permissions are looked up.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default=None,
+            help='The file to write the manifest to. Defaults to the PERMISSIONS_MANIFEST setting, or stdout.')
+
+    def handle(self, *args, **options):
+        load_all_permissions_modules()
+        default_storage.load_pending_modules()
+
+        manifest = json.dumps(default_storage.get_manifest(), indent=2, sort_keys=True)
+        output = options['output'] or getattr(settings, 'PERMISSIONS_MANIFEST', None)
+
+        if output is None:
+            self.stdout.write(manifest)
+            return
+
+        with open(output, 'w') as manifest_file:
+            manifest_file.write(manifest + '\n')
+
+        self.stdout.write('Wrote the manifest to {}.'.format(output))
@@ -0,0 +1,61 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from django_logical_perms.loaders import load_all_permissions_modules
+
+
+class Command(BaseCommand):
+    help = (
+        'Reports how long importing the permissions module of every app took at start up and how many permissions '
+        'it registered. Fails if the imports took longer than the budget.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--budget', type=float, default=None,
+            help='The maximum number of milliseconds all imports may take together. Defaults to the '
+                 'PERMISSIONS_STARTUP_BUDGET setting.')
+        parser.add_argument(
+            '--module-budget', type=float, default=None,
+            help='The maximum number of milliseconds importing a single permissions module may take. Defaults to the '
+                 'PERMISSIONS_STARTUP_MODULE_BUDGET setting.')
+
+    def handle(self, *args, **options):
+        loads = apps.get_app_config('django_logical_perms').permissions_module_loads
+
+        # Permissions modules aren't imported at start up if they're loaded
+        # lazily, so import the ones that haven't been imported yet.
+        if not loads:
+            loads = tuple(load_all_permissions_modules(yield_loads=True))
+
+        loads = sorted((load for load in loads if load.success), key=lambda load: load.duration, reverse=True)
+        total = sum(load.duration for load in loads) * 1000
+
+        self.stdout.write('{:<50} {:>11} {:>10}'.format('App', 'Permissions', 'Time (ms)'))
+
+        for load in loads:
+            self.stdout.write('{:<50} {:>11} {:>10.1f}'.format(load.app_config.name, load.count, load.duration * 1000))
+
+        self.stdout.write('{:<50} {:>11} {:>10.1f}'.format('Total', sum(load.count for load in loads), total))
+
+        budget = options['budget']
+        module_budget = options['module_budget']
+
+        if budget is None:
+            budget = getattr(settings, 'PERMISSIONS_STARTUP_BUDGET', None)
+
+        if module_budget is None:
+            module_budget = getattr(settings, 'PERMISSIONS_STARTUP_MODULE_BUDGET', None)
+
+        if budget is not None and total > budget:
+            raise CommandError(
+                'Importing the permissions modules took {:.1f} ms, which exceeds the budget of {} ms.'.format(
+                    total, budget))
+
+        if module_budget is not None:
+            exceeded = [load.app_config.name for load in loads if load.duration * 1000 > module_budget]
+
+            if exceeded:
+                raise CommandError(
+                    'Importing the permissions modules of {} took longer than the budget of {} ms.'.format(
+                        ', '.join(exceeded), module_budget))
@@ -0,0 +1,19 @@
+from .caches import permission_cache_scope
+
+
+class PermissionCacheScopeMiddleware(object):
+    """
+    Evaluates the permissions of every request within its own cache scope.
+
+    Decisions of permissions that only depend on the object are then shared
+    between all users during the request, and all decisions made during the
+    request are dropped when it finishes. See
+    :func:`~django_logical_perms.caches.permission_cache_scope`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with permission_cache_scope():
+            return self.get_response(request)
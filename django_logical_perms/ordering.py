@@ -0,0 +1,322 @@
+import json
+import time
+
+from django.conf import settings
+
+from .permissions import AllOf, AnyOf, BaseLogicalPermission, CompositeLogicalPermission
+
+_timer = getattr(time, 'perf_counter', time.time)
+
+
+class OperandStatistics(object):
+    """
+    Latency and outcome statistics of a permission that is used as an operand.
+    """
+
+    def __init__(self, evaluations=0, granted=0, total_time=0.0):
+        self.evaluations = evaluations
+        self.granted = granted
+        self.total_time = total_time
+
+    def record(self, duration, result):
+        """
+        Record a single evaluation.
+
+        Args:
+            duration (float): Number of seconds the evaluation took.
+            result (bool): The outcome of the evaluation.
+        """
+        self.evaluations += 1
+        self.total_time += duration
+
+        if result:
+            self.granted += 1
+
+    @property
+    def cost(self):
+        """float: The average number of seconds an evaluation takes."""
+        return self.total_time / self.evaluations if self.evaluations else 0.0
+
+    @property
+    def grant_rate(self):
+        """float: The (smoothed) fraction of evaluations that granted the permission."""
+        return (self.granted + 1.0) / (self.evaluations + 2.0)
+
+    def to_dict(self):
+        return {'evaluations': self.evaluations, 'granted': self.granted, 'total_time': self.total_time}
+
+
+default_statistics = {}
+"""dict: Operand statistics collected in this process, by statistics key."""
+
+
+def get_statistics_key(permission):
+    """
+    Get the key that the statistics of a permission are stored under.
+
+    Args:
+        permission (BaseLogicalPermission): The permission.
+
+    Returns:
+        str: The permission's label or, if it has none, its representation.
+        The operands of composite permissions are sorted, so that the key
+        doesn't change when they're reordered.
+    """
+    if permission.label is not None:
+        return permission.label
+
+    if not isinstance(permission, CompositeLogicalPermission):
+        return repr(permission)
+
+    args = [repr(arg) for arg in permission.get_description_args() if not isinstance(arg, BaseLogicalPermission)]
+    operands = sorted(get_statistics_key(operand) for operand in permission.operands)
+
+    return '{}<{}>'.format(permission.operator, ', '.join(args + operands))
+
+
+def load_statistics(path):
+    """
+    Load operand statistics from a JSON file written by :func:`dump_statistics`.
+
+    Args:
+        path (str): Path to the statistics file.
+
+    Returns:
+        dict: The statistics by statistics key.
+    """
+    with open(path) as stats_file:
+        data = json.load(stats_file)
+
+    return {key: OperandStatistics(**values) for key, values in data.items()}
+
+
+def dump_statistics(path, statistics=None):
+    """
+    Write operand statistics to a JSON file.
+
+    Args:
+        path (str): Path to the statistics file.
+        statistics (dict): The statistics to write. Defaults to the
+            statistics collected in this process.
+    """
+    if statistics is None:
+        statistics = default_statistics
+
+    with open(path, 'w') as stats_file:
+        json.dump({key: stats.to_dict() for key, stats in statistics.items()}, stats_file, indent=2, sort_keys=True)
+
+
+def is_reorderable(permission):
+    """
+    Check whether the operands of a permission may be evaluated in any order.
+
+    Only :class:`AnyOf` and :class:`AllOf` nodes are reordered. A node is left
+    alone if any of its operands is order-sensitive.
+
+    Args:
+        permission (BaseLogicalPermission): The permission to check.
+
+    Returns:
+        bool: True if the operands can be reordered.
+    """
+    return type(permission) in (AnyOf, AllOf) and not permission.order_sensitive
+
+
+def reorder_operands(permission, statistics):
+    """
+    Reorder the operands so that the cheapest, most decisive operands go first.
+
+    Operands are sorted by their average cost divided by the chance that
+    they decide the outcome: granting for :class:`AnyOf`, denying for
+    :class:`AllOf`. Nothing changes unless there are statistics for all
+    operands.
+
+    Args:
+        permission (CompositeLogicalPermission): The permission to reorder.
+        statistics (dict): The operand statistics by statistics key.
+
+    Returns:
+        bool: True if the order of the operands changed.
+    """
+    if not is_reorderable(permission):
+        return False
+
+    operand_stats = [statistics.get(get_statistics_key(operand)) for operand in permission.operands]
+
+    if any(stats is None or not stats.evaluations for stats in operand_stats):
+        return False
+
+    def score(index):
+        stats = operand_stats[index]
+        decisive_rate = stats.grant_rate if type(permission) is AnyOf else 1.0 - stats.grant_rate
+        return stats.cost / decisive_rate
+
+    order = sorted(range(len(permission.operands)), key=score)
+
+    if order == list(range(len(permission.operands))):
+        return False
+
+    permission.operands = tuple(permission.operands[index] for index in order)
+    permission._desc = None
+
+    return True
+
+
+class AdaptiveOperandOrdering(object):
+    """
+    Evaluates a composite permission while recording the operand statistics.
+
+    Every ``interval`` evaluations, the operands are reordered according to
+    the statistics collected so far.
+    """
+
+    def __init__(self, permission, statistics=None, interval=1000):
+        """
+        Initialise a new instance of AdaptiveOperandOrdering.
+
+        Args:
+            permission (CompositeLogicalPermission): An :class:`AnyOf` or
+                :class:`AllOf` permission.
+            statistics (dict): The statistics to record into. Defaults to the
+                statistics collected in this process.
+            interval (int): Number of evaluations between reorderings.
+        """
+        self.permission = permission
+        self.statistics = default_statistics if statistics is None else statistics
+        self.interval = interval
+        self.evaluations = 0
+        self._keys = {}
+
+    def _get_statistics(self, operand):
+        key = self._keys.get(operand)
+
+        if key is None:
+            key = self._keys[operand] = get_statistics_key(operand)
+
+        stats = self.statistics.get(key)
+
+        if stats is None:
+            stats = self.statistics[key] = OperandStatistics()
+
+        return stats
+
+    def has_permission(self, user, obj=None):
+        decisive = type(self.permission) is AnyOf
+        result = not decisive
+
+        for operand in self.permission.operands:
+            start = _timer()
+            outcome = operand(user, obj)
+            self._get_statistics(operand).record(_timer() - start, outcome)
+
+            if bool(outcome) is decisive:
+                result = decisive
+                break
+
+        self.evaluations += 1
+
+        if self.evaluations % self.interval == 0:
+            reorder_operands(self.permission, self.statistics)
+
+        return result
+
+
+def _iterate_reorderable(permission):
+    if isinstance(permission, CompositeLogicalPermission):
+        for operand in permission.operands:
+            for node in _iterate_reorderable(operand):
+                yield node
+
+        if is_reorderable(permission):
+            yield permission
+
+
+def configure_operand_ordering(permissions, mode, statistics=None, interval=1000):
+    """
+    Set up operand ordering for the given permissions and their subexpressions.
+
+    Args:
+        permissions (iterable): The permissions to set up.
+        mode (str): Either ``'static'`` to reorder once using the given
+            statistics, or ``'adaptive'`` to keep recording statistics and
+            reorder while evaluating.
+        statistics (dict): Statistics to start out with.
+        interval (int): Number of evaluations between reorderings in
+            adaptive mode.
+
+    Raises:
+        ValueError: If the mode is not supported.
+    """
+    if mode not in ('static', 'adaptive'):
+        raise ValueError('The operand ordering mode must be either `static` or `adaptive`.')
+
+    if statistics is not None and mode == 'adaptive' and statistics is not default_statistics:
+        default_statistics.update(statistics)
+        statistics = default_statistics
+
+    seen = set()
+
+    for permission in permissions:
+        for node in _iterate_reorderable(permission):
+            if id(node) in seen:
+                continue
+
+            seen.add(id(node))
+
+            if mode == 'static':
+                reorder_operands(node, statistics or {})
+            elif not node.parallel:
+                node.has_permission = AdaptiveOperandOrdering(node, statistics, interval).has_permission
+
+
+def get_operand_ordering_settings():
+    """
+    Read the operand ordering settings.
+
+    The statistics file is only read here, so read the settings once and
+    pass them to :func:`configure_operand_ordering_from_settings`. In adaptive
+    mode, the statistics from the file are added to the statistics collected
+    in this process, which are returned instead.
+
+    Returns:
+        tuple: The ordering mode (None if it's disabled), the statistics and
+        the number of evaluations between reorderings.
+    """
+    mode = getattr(settings, 'PERMISSIONS_OPERAND_ORDERING', None)
+
+    if mode is None:
+        return None, None, None
+
+    stats_file = getattr(settings, 'PERMISSIONS_OPERAND_STATISTICS_FILE', None)
+    statistics = load_statistics(stats_file) if stats_file else None
+
+    if statistics is not None and mode == 'adaptive':
+        default_statistics.update(statistics)
+        statistics = default_statistics
+
+    return mode, statistics, getattr(settings, 'PERMISSIONS_OPERAND_REORDER_INTERVAL', 1000)
+
+
+def configure_operand_ordering_from_settings(permissions, ordering_settings=None):
+    """
+    Set up operand ordering according to the settings.
+
+    Args:
+        permissions (iterable): The permissions to set up.
+        ordering_settings (tuple): The settings as returned by
+            :func:`get_operand_ordering_settings`. They're read if not given.
+
+    Returns:
+        str: The configured ordering mode or None if it's disabled.
+    """
+    if ordering_settings is None:
+        ordering_settings = get_operand_ordering_settings()
+
+    mode, statistics, interval = ordering_settings
+
+    if mode is None:
+        return None
+
+    configure_operand_ordering(permissions, mode, statistics, interval=interval)
+
+    return mode
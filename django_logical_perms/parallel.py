@@ -0,0 +1,132 @@
+import threading
+from concurrent.futures import as_completed, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+try:
+    import contextvars
+except ImportError:  # pragma: no cover
+    contextvars = None
+
+_executor = None
+_executor_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_executor():
+    """
+    Get the thread pool that parallel permissions are evaluated in.
+
+    The pool is created on first use and holds at most
+    ``PERMISSIONS_PARALLEL_MAX_WORKERS`` threads.
+
+    Returns:
+        ThreadPoolExecutor: The shared thread pool.
+    """
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'PERMISSIONS_PARALLEL_MAX_WORKERS', None),
+                    thread_name_prefix='logical-perms')
+
+    return _executor
+
+
+def shutdown_executor(wait=True):
+    """
+    Shut down the thread pool. A new pool is created when it's needed again.
+
+    Args:
+        wait (bool): Whether to wait for running evaluations to finish.
+    """
+    global _executor
+
+    with _executor_lock:
+        executor, _executor = _executor, None
+
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+def _run_in_worker(func, *args):
+    _local.in_worker = True
+
+    try:
+        return func(*args)
+    finally:
+        _local.in_worker = False
+
+        # Every worker thread has its own database connection, which should
+        # be closed the same way Django closes them after a request.
+        close_old_connections()
+
+
+def submit(func, *args):
+    """
+    Run a function in the thread pool.
+
+    The function runs in a copy of the current context, so that it sees the
+    same context variables, such as the current permission cache scope.
+
+    Args:
+        func (callable): The function to run.
+        *args: The arguments to call the function with.
+
+    Returns:
+        Future: The future of the function's outcome.
+    """
+    if contextvars is None:  # pragma: no cover
+        return get_executor().submit(_run_in_worker, func, *args)
+
+    # A context can only be entered by one thread at a time.
+    return get_executor().submit(contextvars.copy_context().run, _run_in_worker, func, *args)
+
+
+class ParallelEvaluation(object):
+    """
+    Evaluates the operands of an :class:`AnyOf` or :class:`AllOf` permission concurrently.
+
+    All operands are submitted to the thread pool at once. The outcome is
+    returned as soon as an operand decides it: the first operand that grants
+    an :class:`AnyOf` or the first operand that denies an :class:`AllOf`.
+    Operands that haven't started yet are cancelled; the outcomes of the ones
+    that are still running are ignored but are cached nevertheless.
+
+    Permissions that are evaluated from within the thread pool are evaluated
+    sequentially, so that nested parallel permissions can't exhaust the pool.
+    """
+
+    def __init__(self, permission):
+        """
+        Initialise a new instance of ParallelEvaluation.
+
+        Args:
+            permission (CompositeLogicalPermission): An :class:`AnyOf` or
+                :class:`AllOf` permission.
+        """
+        from .permissions import AnyOf
+
+        self.permission = permission
+        self.decisive = type(permission) is AnyOf
+
+    def has_permission(self, user, obj=None):
+        permission = self.permission
+
+        if getattr(_local, 'in_worker', False) or len(permission.operands) < 2:
+            return type(permission).has_permission(permission, user, obj)
+
+        futures = [submit(operand.test, user, obj) for operand in permission.operands]
+
+        try:
+            for future in as_completed(futures):
+                if bool(future.result()) is self.decisive:
+                    return self.decisive
+
+            return not self.decisive
+        finally:
+            for future in futures:
+                future.cancel()
@@ -1,7 +1,58 @@
+import itertools
+from functools import partial, reduce
+
+from django.db.models import Q
+
+from .caches import (
+    get_current_scope,
+    get_object_key,
+    get_shared_cache,
+    get_user_cache,
+    MISSING,
+    UNCACHEABLE,
+    watch_models,
+)
+from .coalescing import get_coalescing_key, get_coalescing_timeout, get_single_flight
+from .exceptions import PermissionNotTranslatable
 from .utils import get_permission_label
 
+try:
+    from . import _async
+except SyntaxError:  # pragma: no cover
+    # Coroutines are not supported on Python 2.
+    _async = None
+
+
+def _get_async_mixin(name):
+    if _async is None:
+        return type(name, (object,), {})
+
+    return getattr(_async, name)
+
+
+ALWAYS_Q = ~Q(pk__in=[])
+"""Q: Filter that matches every object."""
+
+NEVER_Q = Q(pk__in=[])
+"""Q: Filter that matches no object at all."""
+
+CACHE_POLICIES = (None, 'request', 'shared')
+"""tuple: The supported values of the ``cache`` attribute of permissions."""
+
+SCOPE_USER = 'user'
+"""str: Scope of permissions that only depend on the user."""
+
+SCOPE_OBJECT = 'object'
+"""str: Scope of permissions that only depend on the object."""
+
+SCOPE_USER_OBJECT = 'user+object'
+"""str: Scope of permissions that depend on both the user and the object."""
 
-class BaseLogicalPermission(object):
+SCOPES = (SCOPE_USER, SCOPE_OBJECT, SCOPE_USER_OBJECT)
+"""tuple: The supported values of the ``scope`` attribute of permissions."""
+
+
+class BaseLogicalPermission(_get_async_mixin('AsyncLogicalPermissionMixin')):
     """
     The very base implementation of a logical permission.
     """
@@ -9,6 +60,35 @@ class BaseLogicalPermission(object):
     label = None
     """str: Permission label. Used to register the permission and in its representation."""
 
+    shared_cache_ttl = None
+    """int: Seconds to keep decisions in the shared cache. Defaults to ``PERMISSIONS_SHARED_CACHE_TTL``."""
+
+    stale_grace = None
+    """int: Seconds an expired shared decision may still be used while it's refreshed in the background."""
+
+    cache = 'shared'
+    """str: Where decisions are cached: ``'shared'``, ``'request'`` (only in the user's cache) or None to not cache."""
+
+    ttl = None
+    """int: Seconds to cache decisions. Defaults to ``PERMISSIONS_CACHE_TTL`` and ``PERMISSIONS_SHARED_CACHE_TTL``."""
+
+    key = None
+    """callable: Projects ``(user, obj)`` onto the inputs of the decision, which is then shared between users."""
+
+    order_sensitive = False
+    """bool: Whether the permission has side effects, so its position among operands may not change."""
+
+    scope = SCOPE_USER_OBJECT
+    """str: What the outcome depends on: ``'user'``, ``'object'`` or ``'user+object'``. Caching follows the scope."""
+
+    depends_on = ()
+    """tuple: Models (or their labels) the outcome depends on. Changing their instances evicts cached decisions."""
+
+    @property
+    def reads_object(self):
+        """bool: Whether the outcome depends on the object, i.e. the scope is not ``'user'``."""
+        return self.scope != SCOPE_USER
+
     def has_permission(self, user, obj=None):
         """
         Test the permission against a User and an optional object.
@@ -30,16 +110,208 @@ class BaseLogicalPermission(object):
         """
         raise NotImplementedError()
 
+    def has_permission_many(self, user, objs):
+        """
+        Test the permission against a User and a list of objects.
+
+        The default implementation calls ``has_permission`` for every object.
+        You can override this method to evaluate the permission for all
+        objects at once, for example by doing a single database query. As
+        with ``has_permission``, this method should not do caching.
+
+        Args:
+            user (User): A Django User object to test the permission against.
+            objs (list): The objects to do object-level permissions on.
+
+        Returns:
+            list: A boolean for every object, True if the permission was
+            granted for that object.
+        """
+        return [self.has_permission(user, obj) for obj in objs]
+
+    def as_q(self, user):
+        """
+        Translate the permission into a filter for a User.
+
+        You should override this method to be able to filter querysets with
+        the permission. The filter must match exactly the objects for which
+        ``has_permission`` would grant the permission.
+
+        Args:
+            user (User): A Django User object to translate the permission for.
+
+        Returns:
+            Q: Filter matching the objects the user is granted the permission on.
+
+        Raises:
+            PermissionNotTranslatable: If the permission can't be translated
+                into a filter.
+        """
+        # Permissions that don't read the object either match all objects
+        # or none at all.
+        if not self.reads_object:
+            return ALWAYS_Q if self.test(user) else NEVER_Q
+
+        raise PermissionNotTranslatable(
+            'The permission {!r} cannot be translated into a Q object. Implement its `as_q` '
+            'method to be able to filter querysets with it.'.format(self))
+
+    def filter(self, user, queryset):
+        """
+        Filter a queryset down to the objects a User is granted the permission on.
+
+        The filtering is done by the database, using the filter returned by
+        ``self.as_q``.
+
+        Args:
+            user (User): A Django User object to test the permission against.
+            queryset (QuerySet): The queryset to filter.
+
+        Returns:
+            QuerySet: The filtered queryset.
+
+        Raises:
+            PermissionNotTranslatable: If the permission can't be translated
+                into a filter.
+        """
+        return queryset.filter(self.as_q(user))
+
+    def partial_evaluate(self, user):
+        """
+        Evaluate the parts of the permission that don't depend on the object.
+
+        Args:
+            user (User): A Django User object to test the permission against.
+
+        Returns:
+            bool, BaseLogicalPermission: The outcome if it doesn't depend on
+            the object, otherwise the permission that remains to be evaluated
+            for every object.
+        """
+        if not self.reads_object:
+            return bool(self.test(user))
+
+        return self
+
+    def bind(self, user):
+        """
+        Specialise the permission for a single User.
+
+        All parts of the permission that don't read the object are evaluated
+        right away, so that only the remaining parts are evaluated for every
+        object. This makes it cheap to test many objects for the same user.
+
+        Args:
+            user (User): A Django User object to test the permission against.
+
+        Returns:
+            BoundPermission: The permission, bound to the user.
+        """
+        return BoundPermission(user, self.partial_evaluate(user))
+
+    def cache_key(self, user, obj=None):
+        """
+        Get the key to cache the permission's decision for an object under.
+
+        You can override this method if the decision depends on something
+        other than the object's identity, or to map multiple objects onto the
+        same decision. The returned key is combined with the permission
+        itself, and the cache is kept per user. If the permission has a
+        ``key`` function, the key is derived from its outcome instead.
+        Permissions with the ``'user'`` scope use a single key for all
+        objects.
+
+        Args:
+            user (User): A Django User object to test the permission against.
+            obj (object): An optional object to do object-level permissions.
+
+        Returns:
+            object: A hashable key or :data:`~django_logical_perms.caches.UNCACHEABLE`
+            to skip the cache entirely.
+        """
+        if self.key is not None:
+            return get_object_key(self.key(user, obj))
+
+        # The decision is the same for any object.
+        if self.scope == SCOPE_USER:
+            return None
+
+        return get_object_key(obj)
+
+    def _get_coalescing(self, user, key):
+        single_flight = get_single_flight()
+
+        if single_flight is None:
+            return None, None, None
+
+        return single_flight, get_coalescing_key(self, user, key), get_coalescing_timeout()
+
+    def _evaluate(self, user, obj, key):
+        single_flight, coalescing_key, timeout = self._get_coalescing(user, key)
+
+        if coalescing_key is None:
+            return self.has_permission(user, obj)
+
+        return single_flight.do(coalescing_key, self.has_permission, user, obj, timeout=timeout)
+
+    def _get_cache(self, user):
+        # Decisions that don't depend on the user, or that are cached under a
+        # projection of the user, are shared between the users of the current
+        # cache scope.
+        if self.scope == SCOPE_OBJECT or self.key is not None:
+            scope = get_current_scope()
+
+            if scope is not None:
+                return scope.get_shared_cache()
+
+        return get_user_cache(user)
+
+    def _get_shared_cache(self):
+        if self.cache != 'shared':
+            return None
+
+        # Shared decisions are keyed by the label, which is only unique for
+        # the permissions registered under it. Others, such as permissions
+        # with the same generated label, are cached per request.
+        from .storages import default_storage
+
+        if self.label is None or default_storage.get_loaded_permissions().get(self.label) is not self:
+            return None
+
+        return get_shared_cache()
+
+    def _store(self, cache, key, result):
+        if self.ttl is None:
+            cache.set((self, key), result)
+        else:
+            cache.set((self, key), result, ttl=self.ttl)
+
+    def _get_refresh(self, user, obj):
+        if not self.stale_grace:
+            return None
+
+        return partial(self.has_permission, user, obj)
+
     def test(self, user, obj=None):
         """
         Test and caches the permission against a User and an optional object.
 
         Note:
-            This method will try getting the result from cache first. If there
-            is no cached result available, the permission is evaluated by
+            This method will try getting the result from cache first, using
+            the key returned by ``self.cache_key``. If there is no cached
+            result available, the permission is evaluated by
             calling ``self.has_permission``. The output will be saved to cache
             to speed up any future lookups.
 
+            If ``PERMISSIONS_COALESCE_EVALUATIONS`` is enabled, concurrent
+            evaluations for the same user and object share a single call
+            to ``self.has_permission``.
+
+            The cache is attached to the user and is configured through the
+            ``PERMISSIONS_CACHE_*`` settings. If ``PERMISSIONS_SHARED_CACHE``
+            is set, decisions are also shared between requests through
+            Django's cache framework.
+
             You should only override this method if you want to implement your
             own caching algorithm. You should override the ``has_permission``
             method to implement the permission.
@@ -51,20 +323,125 @@ class BaseLogicalPermission(object):
         Returns:
             bool: True if the permission was granted.
         """
-        # Build a cache if it's not yet set.
-        if not hasattr(user, '_dlp_cache'):
-            setattr(user, '_dlp_cache', {})
+        if self.cache is None:
+            return self.has_permission(user, obj)
+
+        key = self.cache_key(user, obj)
+
+        # Evaluate without caching if no key could be derived for the object.
+        if key is UNCACHEABLE:
+            return self.has_permission(user, obj)
+
+        cache = self._get_cache(user)
 
         # Try returning results from the cache.
-        if (self, obj) in user._dlp_cache:
-            return user._dlp_cache[(self, obj)]
+        result = cache.get((self, key), MISSING)
+
+        if result is MISSING:
+            shared_cache = self._get_shared_cache()
+
+            # Fall back to the decisions shared between requests.
+            if shared_cache is not None:
+                generations = shared_cache.get_generations(self, user)
+                result = shared_cache.get(
+                    self, user, key, generations=generations, refresh=self._get_refresh(user, obj))
+
+            # Permission has not yet been cached. Evaluate through
+            # ``has_permission``, save to the cache and return the result.
+            if result is MISSING:
+                result = self._evaluate(user, obj, key)
 
-        # Permission has not yet been cached. Evaluate through
-        # ``has_permission``, save to the cache and return the result.
-        result = user._dlp_cache[(self, obj)] = self.has_permission(user, obj)
+                if shared_cache is not None:
+                    shared_cache.set(self, user, key, result, generations=generations)
+
+            self._store(cache, key, result)
 
         return result
 
+    def test_many(self, user, objs):
+        """
+        Test and caches the permission against a User and a list of objects.
+
+        Note:
+            Cached decisions are taken from the same caches as ``test`` uses.
+            All objects without a cached decision are evaluated at once by
+            calling ``self.has_permission_many``, and their decisions are
+            saved to the cache. Objects that share the same cache key are
+            only evaluated once.
+
+        Args:
+            user (User): A Django User object to test the permission against.
+            objs (iterable): The objects to do object-level permissions on.
+
+        Returns:
+            list: A boolean for every object, True if the permission was
+            granted for that object.
+        """
+        objs = list(objs)
+
+        if self.cache is None:
+            return list(self.has_permission_many(user, objs))
+
+        results = [None] * len(objs)
+
+        cache = self._get_cache(user)
+        shared_cache = self._get_shared_cache()
+        generations = None
+
+        # The generations are looked up once for all objects.
+        if shared_cache is not None:
+            generations = shared_cache.get_generations(self, user)
+
+        # Indexes of the objects to evaluate, by cache key. Objects without
+        # a key are evaluated individually.
+        pending = {}
+        uncacheable = []
+
+        for index, obj in enumerate(objs):
+            key = self.cache_key(user, obj)
+
+            if key is UNCACHEABLE:
+                uncacheable.append(index)
+                continue
+
+            if key in pending:
+                pending[key].append(index)
+                continue
+
+            result = cache.get((self, key), MISSING)
+
+            if result is MISSING and shared_cache is not None:
+                result = shared_cache.get(
+                    self, user, key, generations=generations, refresh=self._get_refresh(user, obj))
+
+                if result is not MISSING:
+                    self._store(cache, key, result)
+
+            if result is MISSING:
+                pending[key] = [index]
+            else:
+                results[index] = result
+
+        keys = list(pending)
+        evaluate = [pending[key][0] for key in keys] + uncacheable
+
+        if evaluate:
+            outcomes = self.has_permission_many(user, [objs[index] for index in evaluate])
+
+            for key, result in zip(keys, outcomes):
+                for index in pending[key]:
+                    results[index] = result
+
+                self._store(cache, key, result)
+
+                if shared_cache is not None:
+                    shared_cache.set(self, user, key, result, generations=generations)
+
+            for index, result in zip(uncacheable, outcomes[len(keys):]):
+                results[index] = result
+
+        return results
+
     def __call__(self, user, obj=None):
         """
         Test the permissions against a User and an optional object.
@@ -88,24 +465,16 @@ class BaseLogicalPermission(object):
         return 'LogicalPermission(%s)' % self.label
 
     def __or__(self, other):
-        return ProcessedLogicalPermission(
-            check_func=lambda user, obj=None: self(user, obj) or other(user, obj),
-            desc='Or<{}, {}>'.format(self, other))
+        return AnyOf(self, other)
 
     def __and__(self, other):
-        return ProcessedLogicalPermission(
-            check_func=lambda user, obj=None: self(user, obj) and other(user, obj),
-            desc='And<{}, {}>'.format(self, other))
+        return AllOf(self, other)
 
     def __xor__(self, other):
-        return ProcessedLogicalPermission(
-            check_func=lambda user, obj=None: self(user, obj) ^ other(user, obj),
-            desc='Xor<{}, {}>'.format(self, other))
+        return XorOf(self, other)
 
     def __invert__(self):
-        return ProcessedLogicalPermission(
-            check_func=lambda user, obj=None: not self(user, obj),
-            desc='Not<{}>'.format(self))
+        return Not(self)
 
 
 class LogicalPermission(BaseLogicalPermission):
@@ -118,24 +487,78 @@ class LogicalPermission(BaseLogicalPermission):
         if self.label is None:
             self.label = get_permission_label(self.__class__)
 
+        watch_models(self.depends_on, self.label)
+
 
 class FunctionalLogicalPermission(BaseLogicalPermission):
     """
     A wrapper class for small function-based logical permissions.
     """
-    def __init__(self, check_func, label=None):
+    def __init__(
+            self, check_func, label=None, order_sensitive=False, as_q=None, reads_object=True, depends_on=None,
+            stale_grace=None, cache='shared', ttl=None, key=None, scope=None):
         """
         A new logical permission using the passed in ``check_func``.
 
         Args:
-            check_func (callable): The permission evaluator.
+            check_func (callable): The permission evaluator. This may also be
+                a coroutine function.
             label (str): Custom label for the permission.
+            order_sensitive (bool): Whether the permission has side effects,
+                so its position among combined permissions may not change.
+            as_q (callable): Optional function that takes a user and returns
+                a Q object equivalent to ``check_func``.
+            reads_object (bool): Whether the outcome of ``check_func``
+                depends on the object. This is a shorthand for the
+                ``'user'`` scope.
+            depends_on (iterable): Models (or their labels) the outcome of
+                ``check_func`` depends on.
+            stale_grace (int): Seconds an expired shared decision may still
+                be used while it's refreshed in the background.
+            cache (str): Where decisions are cached: ``'shared'`` (the
+                default), ``'request'`` or None to not cache them.
+            ttl (int): Seconds the decisions stay cached.
+            key (callable): Function that projects ``(user, obj)`` onto the
+                inputs of the decision.
+            scope (str): What the outcome of ``check_func`` depends on:
+                ``'user'``, ``'object'`` or ``'user+object'``.
+
+        Raises:
+            ValueError: If the ``cache`` policy or the scope is not supported.
         """
+        if cache not in CACHE_POLICIES:
+            raise ValueError('The cache policy must be one of {}.'.format(', '.join(map(repr, CACHE_POLICIES))))
+
+        if scope is None:
+            scope = SCOPE_USER_OBJECT if reads_object else SCOPE_USER
+
+        if scope not in SCOPES:
+            raise ValueError('The scope must be one of {}.'.format(', '.join(map(repr, SCOPES))))
+
         if self.label is None and label is None:
             label = get_permission_label(check_func)
 
+        # Coroutine functions are evaluated natively by ``atest``, and
+        # through a synchronous wrapper by ``test``.
+        if _async is not None and _async.is_coroutine_function(check_func):
+            self.ahas_permission = check_func
+            check_func = _async.make_sync(check_func)
+
         self.has_permission = check_func
         self.label = label
+        self.order_sensitive = order_sensitive
+        self.scope = scope
+        self.stale_grace = stale_grace
+        self.cache = cache
+        self.ttl = ttl
+        self.key = key
+
+        if as_q is not None:
+            self.as_q = as_q
+
+        if depends_on:
+            self.depends_on = tuple(depends_on)
+            watch_models(self.depends_on, self.label)
 
 
 class ProcessedLogicalPermission(BaseLogicalPermission):
@@ -145,10 +568,8 @@ class ProcessedLogicalPermission(BaseLogicalPermission):
     This class is especially useful to omit a label and provide your own
     description of the permission that will show up when calling ``repr()``.
 
-    It's currently only used internally when combining or inverting permissions
-    so that resulting LogicalPermission instances will show up as
-    ``Not<LogicalPermission(...)>``,
-    ``Or<LogicalPermission(...), LogicalPermission(...)>`` and so on.
+    Combined and inverted permissions are represented by
+    :class:`CompositeLogicalPermission` instances instead.
 
     The instance will not have a (auto generated) label, so that they can't be
     registered with permission storage without explicitly giving a label
@@ -169,7 +590,539 @@ class ProcessedLogicalPermission(BaseLogicalPermission):
         return self._desc
 
 
-class UserHasPermPermission(BaseLogicalPermission):
+class CompositeLogicalPermission(BaseLogicalPermission):
+    """
+    The base implementation of permissions that combine other permissions.
+
+    Composite permissions form an expression tree: chaining the same
+    associative operator (e.g. ``p1 | p2 | p3``) results in a single,
+    flattened node instead of a nested chain of permissions. The nodes show
+    up as ``Not<LogicalPermission(...)>``,
+    ``Or<LogicalPermission(...), LogicalPermission(...)>`` and so on when
+    calling ``repr()``. The description is only built when it's requested.
+
+    As with :class:`ProcessedLogicalPermission`, composite permissions don't
+    have a label and can only be registered by explicitly giving one.
+    """
+
+    operator = None
+    """str: Name of the operator, used in the representation of the permission."""
+
+    flatten = False
+    """bool: Whether operands of the exact same class get merged into this node."""
+
+    compiled = False
+    """bool: Whether ``has_permission`` has been replaced by a compiled function."""
+
+    parallel = False
+    """bool: Whether the operands are evaluated concurrently in a thread pool."""
+
+    def __init__(self, *operands):
+        """
+        Initialise a new composite permission.
+
+        Args:
+            *operands (BaseLogicalPermission): The permissions to combine.
+
+        Raises:
+            ValueError: If any of the operands is not an instance of
+                :class:`BaseLogicalPermission`.
+        """
+        flattened = []
+
+        for operand in operands:
+            if not isinstance(operand, BaseLogicalPermission):
+                raise ValueError('Permissions can only be combined with instances of BaseLogicalPermission.')
+
+            if self.flatten and type(operand) is type(self):
+                flattened.extend(operand.operands)
+            else:
+                flattened.append(operand)
+
+        self.operands = tuple(flattened)
+        self._desc = None
+
+    @property
+    def order_sensitive(self):
+        return any(operand.order_sensitive for operand in self.operands)
+
+    @property
+    def scope(self):
+        scopes = set(operand.scope for operand in self.operands)
+        return scopes.pop() if len(scopes) == 1 else SCOPE_USER_OBJECT
+
+    @property
+    def depends_on(self):
+        return tuple(itertools.chain.from_iterable(operand.depends_on for operand in self.operands))
+
+    def partial_evaluate(self, user):
+        granted = denied = 0
+        residuals = []
+
+        for index, operand in enumerate(self.operands):
+            # Operands with side effects aren't evaluated ahead of the operands
+            # before them that depend on the object.
+            if residuals and operand.order_sensitive:
+                outcome = operand
+            else:
+                outcome = operand.partial_evaluate(user)
+
+            if outcome is True:
+                granted += 1
+            elif outcome is False:
+                denied += 1
+            else:
+                residuals.append(outcome)
+
+            # Stop at the first decisive operand, like ``has_permission``. The
+            # outcome is known if it doesn't depend on the remaining operands.
+            remaining = self.operands[index + 1:]
+
+            if remaining:
+                outcome = self.fold(granted, denied, residuals + list(remaining))
+
+                if isinstance(outcome, bool):
+                    return outcome
+
+        return self.fold(granted, denied, residuals)
+
+    def fold(self, granted, denied, residuals):
+        """
+        Combine the partially evaluated operands.
+
+        Args:
+            granted (int): The number of operands that granted the permission.
+            denied (int): The number of operands that denied the permission.
+            residuals (list): The operands that depend on the object.
+
+        Returns:
+            bool, BaseLogicalPermission: The outcome if it's known, otherwise
+            the permission that remains to be evaluated.
+        """
+        raise NotImplementedError()
+
+    def compile(self):
+        """
+        Compile the permission's expression into a single generated function.
+
+        The compiled function replaces ``has_permission``, so that the whole
+        expression is evaluated in one call instead of walking the tree.
+
+        Returns:
+            CompositeLogicalPermission: The permission itself.
+
+        Raises:
+            ValueError: If the permission is evaluated in parallel.
+        """
+        from .compiler import compile_permission
+
+        if self.parallel:
+            raise ValueError('Permissions that are evaluated in parallel can\'t be compiled.')
+
+        self.has_permission = compile_permission(self)
+        self.compiled = True
+
+        return self
+
+    def parallelize(self):
+        """
+        Evaluate the operands concurrently in a thread pool.
+
+        This is useful when the operands are slow because they wait for I/O,
+        such as a query on another database. The outcome is returned as soon
+        as it's decided and operands that haven't started yet are cancelled.
+        Only :class:`AnyOf` and :class:`AllOf` permissions can be evaluated in
+        parallel. Combining a parallel permission with other permissions
+        results in a new permission that isn't parallel.
+
+        Returns:
+            CompositeLogicalPermission: The permission itself.
+
+        Raises:
+            ValueError: If the permission can't be evaluated in parallel,
+                because it's not an :class:`AnyOf` or :class:`AllOf`
+                permission or because any of its operands is order-sensitive.
+        """
+        from .parallel import ParallelEvaluation
+
+        if not isinstance(self, (AnyOf, AllOf)):
+            raise ValueError('Only `Or` and `And` permissions can be evaluated in parallel.')
+
+        if self.order_sensitive:
+            raise ValueError('Permissions with order-sensitive operands can\'t be evaluated in parallel.')
+
+        self.has_permission = ParallelEvaluation(self).has_permission
+        self.compiled = False
+        self.parallel = True
+
+        return self
+
+    def get_description_args(self):
+        """
+        Get the arguments to show in the representation of the permission.
+
+        Returns:
+            list: Values that are joined into the description.
+        """
+        return list(self.operands)
+
+    def __repr__(self):
+        if self._desc is None:
+            self._desc = '{}<{}>'.format(self.operator, ', '.join(repr(arg) for arg in self.get_description_args()))
+
+        return self._desc
+
+
+class AnyOf(_get_async_mixin('AsyncAnyOfMixin'), CompositeLogicalPermission):
+    """
+    Grants the permission if at least one of the operands grants it.
+
+    Operands are evaluated in order until one grants the permission.
+    """
+    operator = 'Or'
+    flatten = True
+
+    def has_permission(self, user, obj=None):
+        for operand in self.operands:
+            if operand(user, obj):
+                return True
+
+        return False
+
+    def has_permission_many(self, user, objs):
+        results = [False] * len(objs)
+        undecided = list(range(len(objs)))
+
+        # Every next operand is only evaluated for the objects that haven't
+        # been granted the permission yet.
+        for operand in self.operands:
+            if not undecided:
+                break
+
+            outcomes = operand.test_many(user, [objs[index] for index in undecided])
+
+            for index, outcome in zip(undecided, outcomes):
+                if outcome:
+                    results[index] = True
+
+            undecided = [index for index, outcome in zip(undecided, outcomes) if not outcome]
+
+        return results
+
+    def as_q(self, user):
+        return reduce(lambda left, right: left | right, (operand.as_q(user) for operand in self.operands), NEVER_Q)
+
+    def fold(self, granted, denied, residuals):
+        if granted:
+            return True
+
+        if len(residuals) <= 1:
+            return residuals[0] if residuals else False
+
+        return AnyOf(*residuals)
+
+
+class AllOf(_get_async_mixin('AsyncAllOfMixin'), CompositeLogicalPermission):
+    """
+    Grants the permission if all of the operands grant it.
+
+    Operands are evaluated in order until one denies the permission.
+    """
+    operator = 'And'
+    flatten = True
+
+    def has_permission(self, user, obj=None):
+        for operand in self.operands:
+            if not operand(user, obj):
+                return False
+
+        return True
+
+    def has_permission_many(self, user, objs):
+        results = [True] * len(objs)
+        undecided = list(range(len(objs)))
+
+        # Every next operand is only evaluated for the objects that haven't
+        # been denied the permission yet.
+        for operand in self.operands:
+            if not undecided:
+                break
+
+            outcomes = operand.test_many(user, [objs[index] for index in undecided])
+
+            for index, outcome in zip(undecided, outcomes):
+                if not outcome:
+                    results[index] = False
+
+            undecided = [index for index, outcome in zip(undecided, outcomes) if outcome]
+
+        return results
+
+    def as_q(self, user):
+        return reduce(lambda left, right: left & right, (operand.as_q(user) for operand in self.operands), ALWAYS_Q)
+
+    def fold(self, granted, denied, residuals):
+        if denied:
+            return False
+
+        if len(residuals) <= 1:
+            return residuals[0] if residuals else True
+
+        return AllOf(*residuals)
+
+
+class XorOf(_get_async_mixin('AsyncXorOfMixin'), CompositeLogicalPermission):
+    """
+    Grants the permission if an odd number of the operands grant it.
+
+    For two operands this means that one, but not both, should grant the
+    permission. All operands are always evaluated.
+    """
+    operator = 'Xor'
+    flatten = True
+
+    def has_permission(self, user, obj=None):
+        result = False
+
+        for operand in self.operands:
+            if operand(user, obj):
+                result = not result
+
+        return result
+
+    def has_permission_many(self, user, objs):
+        results = [False] * len(objs)
+
+        for operand in self.operands:
+            results = [result != bool(outcome) for result, outcome in zip(results, operand.test_many(user, objs))]
+
+        return results
+
+    def as_q(self, user):
+        return reduce(
+            lambda left, right: (left & ~right) | (~left & right),
+            (operand.as_q(user) for operand in self.operands), NEVER_Q)
+
+    def fold(self, granted, denied, residuals):
+        inverted = granted % 2 == 1
+
+        if not residuals:
+            return inverted
+
+        residual = residuals[0] if len(residuals) == 1 else XorOf(*residuals)
+
+        return Not(residual) if inverted else residual
+
+
+class AtLeast(_get_async_mixin('AsyncAtLeastMixin'), CompositeLogicalPermission):
+    """
+    Grants the permission if at least ``count`` of the operands grant it.
+
+    Evaluation stops as soon as the outcome is known.
+    """
+    operator = 'AtLeast'
+
+    def __init__(self, count, *operands):
+        """
+        Initialise a new instance of AtLeast.
+
+        Args:
+            count (int): The number of operands that should grant the permission.
+            *operands (BaseLogicalPermission): The permissions to combine.
+
+        Raises:
+            ValueError: If ``count`` is negative or one of the operands is not
+                an instance of :class:`BaseLogicalPermission`.
+        """
+        if count < 0:
+            raise ValueError('`count` must not be negative.')
+
+        super(AtLeast, self).__init__(*operands)
+        self.count = count
+
+    def get_description_args(self):
+        return [self.count] + list(self.operands)
+
+    def has_permission(self, user, obj=None):
+        granted = 0
+        remaining = len(self.operands)
+
+        for operand in self.operands:
+            if granted >= self.count or granted + remaining < self.count:
+                break
+
+            remaining -= 1
+
+            if operand(user, obj):
+                granted += 1
+
+        return granted >= self.count
+
+    def has_permission_many(self, user, objs):
+        granted = [0] * len(objs)
+        remaining = len(self.operands)
+
+        for operand in self.operands:
+            # Only evaluate the objects for which the outcome isn't known yet.
+            undecided = [
+                index for index in range(len(objs))
+                if granted[index] < self.count <= granted[index] + remaining]
+
+            if not undecided:
+                break
+
+            remaining -= 1
+
+            for index, outcome in zip(undecided, operand.test_many(user, [objs[index] for index in undecided])):
+                if outcome:
+                    granted[index] += 1
+
+        return [count >= self.count for count in granted]
+
+    def as_q(self, user):
+        # Any combination of ``count`` granting operands is sufficient. Note
+        # that the size of the filter grows with the number of combinations.
+        operand_qs = [operand.as_q(user) for operand in self.operands]
+
+        return reduce(lambda left, right: left | right, (
+            reduce(lambda left, right: left & right, combination, ALWAYS_Q)
+            for combination in itertools.combinations(operand_qs, self.count)), NEVER_Q)
+
+    def fold(self, granted, denied, residuals):
+        count = self.count - granted
+
+        if count <= 0:
+            return True
+
+        if count > len(residuals):
+            return False
+
+        return AtLeast(count, *residuals)
+
+
+class Not(_get_async_mixin('AsyncNotMixin'), CompositeLogicalPermission):
+    """
+    Inverts the outcome of a single permission.
+    """
+    operator = 'Not'
+
+    def __init__(self, operand):
+        """
+        Initialise a new instance of Not.
+
+        Args:
+            operand (BaseLogicalPermission): The permission to invert.
+        """
+        super(Not, self).__init__(operand)
+
+    @property
+    def operand(self):
+        return self.operands[0]
+
+    def has_permission(self, user, obj=None):
+        return not self.operand(user, obj)
+
+    def has_permission_many(self, user, objs):
+        return [not outcome for outcome in self.operand.test_many(user, objs)]
+
+    def as_q(self, user):
+        return ~self.operand.as_q(user)
+
+    def fold(self, granted, denied, residuals):
+        return Not(residuals[0]) if residuals else not granted
+
+    def __invert__(self):
+        # Inverting twice gives back the original permission.
+        return self.operand
+
+
+class BoundPermission(object):
+    """
+    A permission that has been specialised for a single User.
+
+    Instances are created by :meth:`BaseLogicalPermission.bind`. The parts of
+    the permission that don't depend on the object have already been
+    evaluated, so the bound permission is either a constant or a residual
+    permission that only has to be evaluated for the object.
+    """
+
+    def __init__(self, user, residual):
+        """
+        Initialise a new instance of BoundPermission.
+
+        Args:
+            user (User): The Django User the permission is bound to.
+            residual (bool, BaseLogicalPermission): The constant outcome or
+                the permission that remains to be evaluated.
+        """
+        self.user = user
+        self.residual = residual
+
+    @property
+    def is_constant(self):
+        """bool: Whether the outcome is the same for every object."""
+        return isinstance(self.residual, bool)
+
+    def __call__(self, obj=None):
+        """
+        Test the permission against an optional object.
+
+        Args:
+            obj (object): An optional object to do object-level permissions.
+
+        Returns:
+            bool: True if the permission was granted.
+        """
+        if self.is_constant:
+            return self.residual
+
+        # Residual composite permissions are built for this user only, so
+        # only their operands are cached.
+        if isinstance(self.residual, CompositeLogicalPermission):
+            return self.residual.has_permission(self.user, obj)
+
+        return self.residual.test(self.user, obj)
+
+    def test_many(self, objs):
+        """
+        Test the permission against a list of objects.
+
+        Args:
+            objs (iterable): The objects to do object-level permissions on.
+
+        Returns:
+            list: A boolean for every object.
+        """
+        if self.is_constant:
+            return [self.residual] * len(list(objs))
+
+        if isinstance(self.residual, CompositeLogicalPermission):
+            return self.residual.has_permission_many(self.user, list(objs))
+
+        return self.residual.test_many(self.user, objs)
+
+    def filter(self, queryset):
+        """
+        Filter a queryset down to the objects the permission is granted on.
+
+        Only the residual permission has to be translated into a filter.
+
+        Args:
+            queryset (QuerySet): The queryset to filter.
+
+        Returns:
+            QuerySet: The filtered queryset.
+        """
+        if self.is_constant:
+            return queryset if self.residual else queryset.none()
+
+        return self.residual.filter(self.user, queryset)
+
+    def __repr__(self):
+        return 'Bound<{!r}>'.format(self.residual)
+
+
+class UserHasPermPermission(_get_async_mixin('AsyncUserHasPermMixin'), BaseLogicalPermission):
     """
     Built-in logical permission for Django's ``user.has_perm`` feature.
 
@@ -211,3 +1164,47 @@ class UserHasPermPermission(BaseLogicalPermission):
 
 
 has_perm = UserHasPermPermission
+
+
+def any_of(*permissions):
+    """
+    Combine permissions into a single permission that grants if any of them does.
+
+    Equivalent to ``p1 | p2 | ...`` but builds the flattened node directly.
+
+    Args:
+        *permissions (BaseLogicalPermission): The permissions to combine.
+
+    Returns:
+        AnyOf: The combined permission.
+    """
+    return AnyOf(*permissions)
+
+
+def all_of(*permissions):
+    """
+    Combine permissions into a single permission that grants if all of them do.
+
+    Equivalent to ``p1 & p2 & ...`` but builds the flattened node directly.
+
+    Args:
+        *permissions (BaseLogicalPermission): The permissions to combine.
+
+    Returns:
+        AllOf: The combined permission.
+    """
+    return AllOf(*permissions)
+
+
+def at_least(count, *permissions):
+    """
+    Combine permissions into a single permission that grants if enough of them do.
+
+    Args:
+        count (int): The number of permissions that should grant the permission.
+        *permissions (BaseLogicalPermission): The permissions to combine.
+
+    Returns:
+        AtLeast: The combined permission.
+    """
+    return AtLeast(count, *permissions)
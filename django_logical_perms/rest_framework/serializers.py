@@ -1,5 +1,6 @@
 from collections import OrderedDict
 
+from django.db import models
 from rest_framework import serializers
 from rest_framework.fields import SkipField
 from rest_framework.relations import PKOnlyObject
@@ -7,6 +8,24 @@ from rest_framework.relations import PKOnlyObject
 from ..configs import FieldPermissionConfigSet
 
 
+class FieldPermissionsListSerializer(serializers.ListSerializer):
+    """
+    List serializer that evaluates the field-based permissions in bulk.
+
+    Before serializing the objects, the permissions of all fields are
+    evaluated for all objects at once, so that the individual objects can
+    be serialized using the cached decisions.
+    """
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        objs = list(iterable)
+
+        self.child.Meta.field_permissions.prefetch(
+            action='view', user=self.child._get_request().user, objs=objs)
+
+        return super(FieldPermissionsListSerializer, self).to_representation(objs)
+
+
 class FieldPermissionsSerializer(serializers.ModelSerializer):
     """
     Incorporate per object field-based permissions in REST framework.
@@ -32,6 +51,22 @@ class FieldPermissionsSerializer(serializers.ModelSerializer):
 
         super(FieldPermissionsSerializer, self).__init__(*args, **kwargs)
 
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        # Respect a custom list serializer class.
+        if hasattr(getattr(cls, 'Meta', None), 'list_serializer_class'):
+            return super(FieldPermissionsSerializer, cls).many_init(*args, **kwargs)
+
+        # Some keyword arguments only apply to the list serializer.
+        list_kwargs = {
+            key: kwargs.pop(key) for key in ('allow_empty', 'max_length', 'min_length') if key in kwargs}
+
+        list_kwargs['child'] = cls(*args, **kwargs)
+        list_kwargs.update({
+            key: value for key, value in kwargs.items() if key in serializers.LIST_SERIALIZER_KWARGS})
+
+        return FieldPermissionsListSerializer(*args, **list_kwargs)
+
     def _get_request(self):
         request = self.context.get('request', None)
 
@@ -1,23 +1,198 @@
+import threading
+from importlib import import_module
+
+try:
+    from types import MappingProxyType
+except ImportError:  # pragma: no cover
+    # Python 2 has no read-only view, so frozen storages keep a copy.
+    MappingProxyType = dict
+
+from django.conf import settings
+
+from .caches import assign_permission_id, watch_models
 from .exceptions import PermissionNotFound
-from .permissions import BaseLogicalPermission
+from .ordering import configure_operand_ordering_from_settings, get_operand_ordering_settings
+from .permissions import BaseLogicalPermission, CompositeLogicalPermission
 
 
 class PermissionStorage(object):
     """
     The default storage class for logical permissions.
+
+    Attributes:
+        generation (int): Counts the changes to the registered permissions,
+            so that anything derived from them can tell when it's outdated.
     """
     def __init__(self):
         self._permissions = {}
+        self._modules = {}
+        self._pending = {}
+        self._unprepared = {}
+        self._lock = threading.RLock()
+        self._loading = threading.local()
+        self._ordering_settings = None
+        self.generation = 0
+        self.frozen = False
+        self.lazy = False
 
     def get_all_permissions(self):
         """
         Return a list of all currently registered permissions.
 
+        If the storage loads permissions lazily, the permissions modules that
+        haven't been imported yet are imported first.
+
         Returns:
             dict: A dictionary of all currently registered permissions.
         """
+        if self._pending:
+            self.load_pending_modules()
+
+        if self.lazy and self._unprepared:
+            self.prepare_permissions()
+
+        return self._permissions
+
+    def get_loaded_permissions(self):
+        """
+        Return the permissions that are registered so far.
+
+        Unlike :meth:`get_all_permissions`, this doesn't import the
+        permissions modules that are loaded lazily.
+
+        Returns:
+            dict: A dictionary of the registered permissions.
+        """
         return self._permissions
 
+    def load_module(self, module_path):
+        """
+        Import a permissions module and track the permissions it registers.
+
+        Args:
+            module_path (str): The dotted path of the module.
+
+        Returns:
+            dict: The permissions that were registered by the module, also if
+            it was loaded before.
+        """
+        # The import isn't done while holding the lock, as the module may
+        # import other modules that look up permissions in other threads.
+        # Permissions are attributed to the module that is being loaded in
+        # the thread that registers them (see :meth:`register`).
+        loading = self._get_loading_modules()
+        loading.append(module_path)
+
+        try:
+            import_module(module_path)
+        finally:
+            loading.pop()
+
+        with self._lock:
+            for label in [label for label, path in self._pending.items() if path == module_path]:
+                del self._pending[label]
+
+            return dict(
+                (label, self._permissions[label]) for label, path in self._modules.items() if path == module_path)
+
+    def _get_loading_modules(self):
+        if not hasattr(self._loading, 'modules'):
+            self._loading.modules = []
+
+        return self._loading.modules
+
+    def load_lazily(self, manifest):
+        """
+        Import permissions modules only when one of their permissions is needed.
+
+        Permissions that are registered from now on, including those of
+        modules that are imported directly, are prepared (see
+        :meth:`prepare_permissions`) before they're first looked up.
+
+        Args:
+            manifest (dict): The dotted paths of the permissions modules by the
+                labels of the permissions they register, as returned by
+                :meth:`get_manifest`.
+        """
+        with self._lock:
+            self._pending = dict(
+                (label, module_path) for label, module_path in manifest.items() if label not in self._permissions)
+            self.lazy = True
+
+    def prepare_permissions(self, ordering_settings=None):
+        """
+        Prepare the permissions registered since the last preparation for evaluation.
+
+        Sets up the ordering of their operands according to the settings,
+        compiles the composite permissions, gives the permissions an id (see
+        :func:`~django_logical_perms.caches.assign_permission_id`) and watches
+        the models they depend on. This is done once the permissions modules
+        have been loaded and, if they're loaded lazily, before newly
+        registered permissions are looked up.
+
+        Args:
+            ordering_settings (tuple): The operand ordering settings, as
+                returned by :func:`~django_logical_perms.ordering.get_operand_ordering_settings`.
+                They're kept for later preparations. If they're not given
+                now or before, they're read once.
+        """
+        with self._lock:
+            if ordering_settings is not None:
+                self._ordering_settings = ordering_settings
+
+            permissions = dict(self._unprepared)
+
+            if permissions:
+                self._prepare(permissions)
+
+            for label in permissions:
+                self._unprepared.pop(label, None)
+
+    def _prepare(self, permissions):
+        # Reading the settings again would reload the statistics file, and
+        # overwrite the statistics collected since in adaptive mode.
+        if self._ordering_settings is None:
+            self._ordering_settings = get_operand_ordering_settings()
+
+        ordering = configure_operand_ordering_from_settings(permissions.values(), self._ordering_settings)
+
+        # Adaptive ordering needs the interpreted evaluation to record its
+        # statistics, so those permissions are not compiled.
+        compile_permissions = getattr(settings, 'PERMISSIONS_COMPILE', True) and ordering != 'adaptive'
+
+        # Ids follow the order of the labels within a preparation. Modules
+        # that are loaded lazily get theirs in the order they're looked up,
+        # so ids only identify permissions within a process.
+        for label in sorted(permissions):
+            permission = permissions[label]
+
+            if compile_permissions and isinstance(permission, CompositeLogicalPermission) and not (
+                    permission.compiled or permission.parallel):
+                permission.compile()
+
+            # Decisions of registered permissions can be stored compactly.
+            assign_permission_id(permission)
+            watch_models(permission.depends_on, label)
+
+    def load_pending_modules(self):
+        """
+        Import all permissions modules that are loaded lazily and haven't been imported yet.
+        """
+        for module_path in sorted(set(self._pending.values())):
+            self.load_module(module_path)
+
+    def get_manifest(self):
+        """
+        Map the labels of permissions onto the modules that registered them.
+
+        Only permissions that were registered while importing a module
+        through :meth:`load_module` are included.
+
+        Returns:
+            dict: The dotted paths of the modules by permission label.
+        """
+        return dict(self._modules)
+
     def register(self, permission, label=None):
         """
         Register a permission with the storage instance.
@@ -33,8 +208,13 @@ class PermissionStorage(object):
 
         Raises:
             ValueError: If the permission is not an instance of
-                :class:`BaseLogicalPermission`.
+                :class:`BaseLogicalPermission` or if the storage is frozen.
         """
+        if self.frozen:
+            raise ValueError(
+                'The permission {} cannot be registered with the {} storage backend '
+                'because the storage is frozen.'.format(label or permission, self.__class__.__name__))
+
         if not isinstance(permission, BaseLogicalPermission):
             raise ValueError(
                 'Registering permissions with the PermissionStorage backend is only '
@@ -46,13 +226,88 @@ class PermissionStorage(object):
         if label is None:
             raise ValueError('The permission must have a label.')
 
-        if label in self.get_all_permissions():
+        with self._lock:
+            if label in self._permissions:
+                raise ValueError(
+                    'The permission {} ({}) cannot be registered with the {} storage backend '
+                    'because another permission with the same name already exists.'.format(
+                        label, permission, self.__class__.__name__))
+
+            self._permissions[label] = permission
+            self._unprepared[label] = permission
+            self.generation += 1
+
+            loading = self._get_loading_modules()
+
+            if loading:
+                self._modules[label] = loading[-1]
+
+    def unregister(self, label):
+        """
+        Remove a permission from the storage.
+
+        Args:
+            label (str): The permission's label.
+
+        Raises:
+            PermissionNotFound: If there is no permission registered with the
+                label.
+            ValueError: If the storage is frozen.
+        """
+        if self.frozen:
             raise ValueError(
-                'The permission {} ({}) cannot be registered with the {} storage backend '
-                'because another permission with the same name already exists.'.format(
-                    label, permission, self.__class__.__name__))
+                'The permission {} cannot be unregistered from the {} storage backend '
+                'because the storage is frozen.'.format(label, self.__class__.__name__))
+
+        with self._lock:
+            if label not in self._permissions:
+                raise PermissionNotFound(
+                    'There is no permission registered with the label {} in the '
+                    '{} storage backend.'.format(
+                        label, self.__class__.__name__))
+
+            del self._permissions[label]
+            self._unprepared.pop(label, None)
+            self._modules.pop(label, None)
+            self.generation += 1
+
+    def freeze(self):
+        """
+        Make the storage read-only.
+
+        Once all permissions modules have been loaded, the registered
+        permissions won't change anymore. Freezing imports the permissions
+        modules that are loaded lazily, prepares all permissions that
+        haven't been prepared yet (see :meth:`prepare_permissions`) and
+        replaces the registry by a read-only mapping, after which
+        :meth:`register` raises an error.
+
+        When the storage is frozen before the web server forks its worker
+        processes, the workers share the prepared permissions instead of each
+        building them again. Freezing a frozen storage does nothing.
+        """
+        if self.frozen:
+            return
+
+        self.load_pending_modules()
+        self.prepare_permissions()
+        self._permissions = MappingProxyType(dict(self._permissions))
+        self.frozen = True
 
-        self._permissions[label] = permission
+    def __contains__(self, label):
+        """
+        Check whether a permission is registered, without raising an exception.
+
+        Permissions of modules that are loaded lazily are included, without
+        importing the modules.
+
+        Args:
+            label (str): The permission's label.
+
+        Returns:
+            bool: True if a permission is registered with the label.
+        """
+        return label in self._permissions or label in self._pending
 
     def get_permission(self, label):
         """
@@ -71,7 +326,18 @@ class PermissionStorage(object):
         Returns:
             BaseLogicalPermission: The permission from the storage.
         """
-        permission = self.get_all_permissions().get(label, None)
+        permission = self._permissions.get(label, None)
+
+        # Import the module that registers the permission if it's loaded lazily.
+        if permission is None and self._pending:
+            module_path = self._pending.get(label)
+
+            if module_path is not None:
+                self.load_module(module_path)
+                permission = self._permissions.get(label, None)
+
+        if self.lazy and self._unprepared:
+            self.prepare_permissions()
 
         if permission is None:
             raise PermissionNotFound(
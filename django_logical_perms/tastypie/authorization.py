@@ -1,15 +1,42 @@
 from tastypie.authorization import DjangoAuthorization
 
+from ..storages import default_storage
+
 
 class DjangoObjectAuthorization(DjangoAuthorization):
     """
     Authorization class that will add object-level permission checks to Tastypie's ``DjangoAuthorization`` class.
     """
+    prefetch_batch_size = 20
+    """int: The number of objects of a list that are evaluated at once."""
+
+    def prefetch_user_perm(self, user, permission, objs):
+        """
+        Evaluate a logical permission for a list of objects at once.
+
+        The decisions end up in the user's permission cache, so that the
+        following ``user.has_perm`` calls for those objects are cache hits.
+        Labels that aren't registered as logical permissions are ignored.
+        """
+        if permission in default_storage:
+            default_storage.get_permission(permission).test_many(user, objs)
+
     def check_user_perm(self, user, permission, obj_or_list):
         if isinstance(obj_or_list, list):
-            for obj in obj_or_list:
-                if not user.has_perm(permission, obj) and not user.has_perm(permission):
-                    return False
+            # The model-level permission applies to every object, in which
+            # case none of them have to be evaluated.
+            if user.has_perm(permission):
+                return True
+
+            # The objects are evaluated in batches, so that the objects after
+            # the first denied one aren't evaluated for nothing.
+            for start in range(0, len(obj_or_list), self.prefetch_batch_size):
+                batch = obj_or_list[start:start + self.prefetch_batch_size]
+                self.prefetch_user_perm(user, permission, batch)
+
+                for obj in batch:
+                    if not user.has_perm(permission, obj):
+                        return False
 
             return True
 
@@ -1,4 +1,4 @@
-from setuptools import setup
+from setuptools import find_packages, setup
 
 __title__ = 'django-logical-perms'
 __author__ = 'Devhouse Spindle'
@@ -23,11 +23,10 @@ setup(
     license=__license__,
     url='https://github.com/wearespindle/django-logical-perms',
     download_url='https://github.com/wearespindle/django-logical-perms.git',
-    packages=[
-        'django_logical_perms',
-    ],
+    packages=find_packages(exclude=('tests', 'tests.*')),
     install_requires=[
         'Django>=1.8.0',
+        'futures; python_version < "3"',
     ],
     tests_require=[
         'djangorestframework==3.7.7',
@@ -0,0 +1,42 @@
+import asyncio
+
+from django_logical_perms.caches import permission_cache_scope
+from django_logical_perms.decorators import permission
+from django_logical_perms.permissions import LogicalPermission
+
+calls = []
+
+
+@permission
+async def async_permission(user, obj=None):
+    calls.append('async')
+    await asyncio.sleep(0)
+    return obj == 'yes'
+
+
+class AsyncClassPermission(LogicalPermission):
+    async def ahas_permission(self, user, obj=None):
+        calls.append('async_class')
+        return True
+
+    def has_permission(self, user, obj=None):
+        calls.append('sync_class')
+        return True
+
+
+async def scoped_atest(perm, user, obj=None):
+    with permission_cache_scope() as scope:
+        await perm.atest(user, obj)
+        await asyncio.sleep(0)
+        return await perm.atest(user, obj), len(scope)
+
+
+@permission
+async def slow_async_permission(user, obj=None):
+    calls.append('slow_async')
+    await asyncio.sleep(0.01)
+    return obj == 'yes'
+
+
+async def gather(*coroutines):
+    return await asyncio.gather(*coroutines)
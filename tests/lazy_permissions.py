@@ -0,0 +1,6 @@
+from django_logical_perms.decorators import permission
+
+
+@permission(register=True)
+def lazy_permission(user, obj=None):
+    return True
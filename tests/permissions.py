@@ -1,5 +1,8 @@
+import time
+
 from django_logical_perms.decorators import permission
-from django_logical_perms.permissions import LogicalPermission
+from django_logical_perms.permissions import FunctionalLogicalPermission, LogicalPermission
+from django_logical_perms.storages import default_storage
 
 
 class SimplePermission(LogicalPermission):
@@ -21,6 +24,32 @@ class StaticLabelPermission(SimplePermission):
     label = 'tests.static_permission'
 
 
+def make_perm(name, result, calls, label=None, order_sensitive=False, delay=None):
+    """
+    Make a permission that records its evaluations.
+
+    Args:
+        name (str): The name appended to ``calls`` on every evaluation and,
+            unless ``label`` is given, the label of the permission.
+        result (bool, callable): The outcome, or a function that's given the
+            name and returns the outcome.
+        calls (list): The list the evaluations are recorded in.
+        label (str): Optional label of the permission.
+        order_sensitive (bool): Whether the permission is order-sensitive.
+        delay (float): Optional number of seconds an evaluation takes.
+    """
+    def check(user, obj=None):
+        calls.append(name)
+
+        if delay is not None:
+            time.sleep(delay)
+
+        return result(name) if callable(result) else result
+
+    return FunctionalLogicalPermission(
+        check, label=name if label is None else label, order_sensitive=order_sensitive)
+
+
 @permission
 def simple_decorated_permission(user, obj=None):
     return True
@@ -34,3 +63,6 @@ def simple_labeled_permission(user, obj=None):
 @permission(register=True)
 def registered_permission(user, obj=None):
     return True
+
+
+default_storage.register(registered_permission & ~simple_decorated_permission, label='tests.composite_permission')
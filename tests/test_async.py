@@ -0,0 +1,119 @@
+import sys
+from unittest import skipIf
+
+try:
+    import asyncio
+except ImportError:  # pragma: no cover
+    # Python 2 has no asyncio, and the tests below are skipped.
+    asyncio = None
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import override_settings, TestCase
+from django_logical_perms.backends import LogicalPermissionsBackend
+from django_logical_perms.decorators import permission
+from django_logical_perms.permissions import at_least
+from django_logical_perms.storages import default_storage
+
+if sys.version_info >= (3, 5):
+    from .async_permissions import (
+        async_permission,
+        AsyncClassPermission,
+        calls,
+        gather,
+        scoped_atest,
+        slow_async_permission,
+    )
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+@skipIf(sys.version_info < (3, 5), 'Coroutines require Python 3.5 or higher')
+class AsyncPermissionsTestCase(TestCase):
+    def setUp(self):
+        del calls[:]
+
+    def test_async_permission(self):
+        """
+        Tests evaluating permissions from coroutines.
+        """
+        user = AnonymousUser()
+        class_perm = AsyncClassPermission()
+
+        @permission
+        def sync_permission(user, obj=None):
+            calls.append('sync')
+            return obj == 'yes'
+
+        # Native coroutines are awaited, synchronous permissions run in a thread.
+        self.assertTrue(run(async_permission.atest(user, 'yes')))
+        self.assertTrue(run(class_perm.atest(user)))
+        self.assertTrue(run(sync_permission.atest(user, 'yes')))
+        self.assertEqual(calls, ['async', 'async_class', 'sync'])
+
+        # The results are shared with the synchronous cache.
+        self.assertTrue(async_permission(user, 'yes'))
+        self.assertTrue(sync_permission(user, 'yes'))
+        self.assertEqual(calls, ['async', 'async_class', 'sync'])
+
+        # Coroutine permissions can still be evaluated synchronously.
+        self.assertFalse(async_permission(user, 'no'))
+        self.assertEqual(calls, ['async', 'async_class', 'sync', 'async'])
+
+    def test_async_combined_permissions(self):
+        """
+        Tests whether combined permissions short-circuit when evaluated from coroutines.
+        """
+        user = AnonymousUser()
+
+        @permission
+        def sync_permission(user, obj=None):
+            calls.append('sync')
+            return True
+
+        self.assertTrue(run((async_permission | sync_permission).atest(user, 'yes')))
+        self.assertEqual(calls, ['async'])
+
+        self.assertFalse(run((async_permission & sync_permission).atest(user, 'no')))
+        self.assertEqual(calls, ['async', 'async'])
+
+        self.assertTrue(run((~async_permission ^ sync_permission).atest(AnonymousUser(), 'yes')))
+        self.assertTrue(run(at_least(1, async_permission, sync_permission).atest(AnonymousUser(), 'no')))
+
+    def test_async_cache_scope(self):
+        """
+        Tests whether concurrent tasks sharing a user get their own cache scope.
+        """
+        user = AnonymousUser()
+
+        tasks = gather(scoped_atest(async_permission, user, 'yes'), scoped_atest(async_permission, user, 'yes'))
+        self.assertEqual(run(tasks), [(True, 1), (True, 1)])
+
+        # Every task evaluated the permission once in its own scope.
+        self.assertEqual(calls, ['async', 'async'])
+        self.assertNotIn('_dlp_cache', vars(user))
+
+    @override_settings(PERMISSIONS_COALESCE_EVALUATIONS=True)
+    def test_async_coalescing(self):
+        """
+        Tests whether concurrent tasks evaluating the same permission share a single evaluation.
+        """
+        tasks = gather(*(slow_async_permission.atest(AnonymousUser(), 'yes') for _ in range(3)))
+        self.assertEqual(run(tasks), [True] * 3)
+        self.assertEqual(calls, ['slow_async'])
+
+    def test_async_backend(self):
+        """
+        Tests the asynchronous counterpart of the authentication backend.
+        """
+        default_storage.register(async_permission, label='tests.async_permission')
+        backend = LogicalPermissionsBackend()
+
+        self.assertTrue(run(backend.ahas_perm(AnonymousUser(), 'tests.async_permission', 'yes')))
+        self.assertFalse(run(backend.ahas_perm(AnonymousUser(), 'tests.blep')))
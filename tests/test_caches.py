@@ -0,0 +1,763 @@
+import gc
+import threading
+import uuid
+
+from django.contrib.auth.models import AnonymousUser, Group, User
+from django.core.cache import caches
+from django.test import override_settings, TestCase
+from django_logical_perms import parallel
+from django_logical_perms.caches import (
+    assign_permission_id,
+    CompactPermissionCache,
+    get_cache_report,
+    get_current_scope,
+    get_object_key,
+    get_shared_cache,
+    get_user_cache,
+    invalidate,
+    is_stable_key,
+    LRUPermissionCache,
+    MISSING,
+    permission_cache_scope,
+    UNCACHEABLE,
+    WeakObjectKey,
+)
+from django_logical_perms.decorators import permission
+from django_logical_perms.middleware import PermissionCacheScopeMiddleware
+from django_logical_perms.parallel import shutdown_executor
+from django_logical_perms.storages import default_storage
+
+from .permissions import ChangingPermission, SimplePermission
+
+
+class PermissionCacheTestCase(TestCase):
+    def test_lru_cache(self):
+        """
+        Tests whether the LRU cache evicts the least recently used decisions.
+        """
+        cache = LRUPermissionCache(max_size=2)
+
+        cache.set('a', True)
+        cache.set('b', False)
+
+        # Touch 'a' so that 'b' becomes the least recently used entry.
+        self.assertTrue(cache.get('a'))
+
+        cache.set('c', True)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.get('b'), MISSING)
+        self.assertTrue(cache.get('a'))
+        self.assertTrue(cache.get('c'))
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+        # Invalid sizes and TTLs are not allowed.
+        with self.assertRaises(ValueError):
+            LRUPermissionCache(max_size=0)
+
+        with self.assertRaises(ValueError):
+            LRUPermissionCache(ttl=-1)
+
+    def test_ttl_cache(self):
+        """
+        Tests whether expired decisions are treated as missing.
+        """
+        cache = LRUPermissionCache(ttl=0)
+        cache.set('a', True)
+
+        self.assertIs(cache.get('a'), MISSING)
+        self.assertIsNone(cache.get('a', None))
+        self.assertEqual(len(cache), 0)
+
+    def test_compact_cache(self):
+        """
+        Tests whether decisions of permissions with an id are stored compactly.
+        """
+        cache = CompactPermissionCache()
+        perm = SimplePermission()
+        unregistered = SimplePermission()
+        assign_permission_id(perm)
+
+        keys = [(perm, get_object_key(User(pk=pk))) for pk in range(10, 20)]
+
+        for pk, key in enumerate(keys):
+            cache.set(key, pk % 2 == 0)
+
+        cache.set((perm, None), True)
+        cache.set((perm, 'a'), False)
+        cache.set((unregistered, None), True)
+
+        # Only the odd keys ended up in the dictionary.
+        self.assertEqual(len(cache), 13)
+        self.assertEqual(len(cache._entries), 2)
+        self.assertEqual(set(cache.keys()), set(keys + [(perm, None), (perm, 'a'), (unregistered, None)]))
+
+        self.assertEqual([cache.get(key) for key in keys], [pk % 2 == 0 for pk in range(10)])
+        self.assertTrue(cache.get((perm, None)))
+        self.assertFalse(cache.get((perm, 'a')))
+        self.assertTrue(cache.get((unregistered, None)))
+        self.assertIs(cache.get((perm, get_object_key(User(pk=9)))), MISSING)
+
+        # Primary keys that are far apart and decisions that expire are not
+        # stored compactly.
+        cache.set((perm, get_object_key(User(pk=10 ** 6))), True)
+        cache.set(keys[0], False, ttl=0)
+        self.assertEqual(len(cache._entries), 4)
+        self.assertTrue(cache.get((perm, get_object_key(User(pk=10 ** 6)))))
+        self.assertIs(cache.get(keys[0]), MISSING)
+
+        cache.evict(lambda key: key[1] == get_object_key(User(pk=11)))
+        self.assertIs(cache.get(keys[1]), MISSING)
+        self.assertEqual(len(cache), 12)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertIs(cache.get(keys[2]), MISSING)
+
+    def test_threaded_cache(self):
+        """
+        Tests whether the LRU cache can be filled from multiple threads.
+        """
+        cache = LRUPermissionCache(max_size=8)
+
+        def fill(offset):
+            for index in range(1000):
+                cache.set(offset + index % 16, True)
+                cache.get(offset + (index + 1) % 16)
+
+        threads = [threading.Thread(target=fill, args=(offset,)) for offset in range(0, 64, 16)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(cache), 8)
+
+    @override_settings(PERMISSIONS_CACHE_MAX_SIZE=1)
+    def test_user_cache_settings(self):
+        """
+        Tests whether the user's cache is configured through the settings.
+        """
+        random_perm = ChangingPermission()
+        user = AnonymousUser()
+
+        random_perm.set_result('a', True)
+        random_perm.set_result('b', True)
+
+        self.assertTrue(random_perm(user, obj='a'))
+        self.assertTrue(random_perm(user, obj='b'))
+
+        # The cache only holds a single decision, so 'a' got evicted and
+        # will be evaluated again.
+        self.assertEqual(get_user_cache(user).max_size, 1)
+        self.assertEqual(len(get_user_cache(user)), 1)
+
+        random_perm.set_result('a', False)
+        random_perm.set_result('b', False)
+
+        self.assertFalse(random_perm(user, obj='a'))
+
+    def test_cache_policy(self):
+        """
+        Tests whether permissions can opt out of caching or set their own TTL.
+        """
+        calls = []
+        user = AnonymousUser()
+
+        @permission(cache=None)
+        def cheap_permission(user, obj=None):
+            calls.append('cheap')
+            return True
+
+        @permission(ttl=0)
+        def short_lived_permission(user, obj=None):
+            calls.append('short_lived')
+            return True
+
+        for _ in range(2):
+            self.assertTrue(cheap_permission(user))
+            self.assertTrue(short_lived_permission(user))
+            self.assertEqual(cheap_permission.test_many(user, ['a']), [True])
+
+        self.assertEqual(calls, ['cheap', 'short_lived', 'cheap'] * 2)
+        self.assertIs(get_user_cache(user).get((cheap_permission, None)), MISSING)
+
+        with self.assertRaises(ValueError):
+            permission(cache='forever')(lambda user, obj=None: True)
+
+    def test_permission_scopes(self):
+        """
+        Tests whether decisions are cached according to the scope of the permission.
+        """
+        calls = []
+
+        @permission(scope='user')
+        def user_is_staff(user, obj=None):
+            calls.append('user')
+            return user.is_staff
+
+        @permission(scope='object')
+        def obj_is_public(user, obj=None):
+            calls.append('object')
+            return obj == 'public'
+
+        user, other_user = User.objects.create(username=uuid.uuid4()), User.objects.create(username=uuid.uuid4())
+
+        # User-only decisions collapse into a single entry.
+        self.assertEqual(user_is_staff.test_many(user, ['a', 'b', 'c']), [False] * 3)
+        self.assertFalse(user_is_staff(user, 'd'))
+        self.assertEqual(calls, ['user'])
+        self.assertEqual(len(get_user_cache(user)), 1)
+        self.assertFalse(user_is_staff.reads_object)
+
+        # Object-only decisions are shared between the users of a cache scope.
+        del calls[:]
+
+        with permission_cache_scope():
+            self.assertTrue(obj_is_public(user, 'public'))
+            self.assertTrue(obj_is_public(other_user, 'public'))
+
+        self.assertEqual(calls, ['object'])
+
+        # So are the decisions of users with the same projection.
+        @permission(key=lambda user, obj: (user.is_staff, obj), cache='request')
+        def projected_permission(user, obj=None):
+            calls.append('projected')
+            return not user.is_staff
+
+        del calls[:]
+
+        with permission_cache_scope():
+            self.assertTrue(projected_permission(user, 'a'))
+            self.assertTrue(projected_permission(other_user, 'a'))
+
+        self.assertEqual(calls, ['projected'])
+
+        # The scope of combined permissions follows from their operands.
+        self.assertEqual((user_is_staff | ~user_is_staff).scope, 'user')
+        self.assertEqual((user_is_staff | obj_is_public).scope, 'user+object')
+
+        with self.assertRaises(ValueError):
+            permission(scope='group')(lambda user, obj=None: True)
+
+    def test_cache_scope_middleware(self):
+        """
+        Tests whether every request gets its own cache scope.
+        """
+        scopes = []
+
+        def get_response(request):
+            scopes.append(get_current_scope())
+            return request
+
+        middleware = PermissionCacheScopeMiddleware(get_response)
+
+        self.assertEqual(middleware('request'), 'request')
+        self.assertIsNotNone(scopes[0])
+        self.assertIsNone(get_current_scope())
+
+    def test_cache_scope(self):
+        """
+        Tests whether decisions made within a cache scope are dropped when it exits.
+        """
+        random_perm = ChangingPermission()
+        random_perm.set_result('a', True)
+
+        user = User.objects.create(username=uuid.uuid4())
+
+        with permission_cache_scope() as scope:
+            self.assertTrue(random_perm(user, obj='a'))
+
+            # Separately fetched instances of the user share the scope's cache.
+            random_perm.set_result('a', False)
+            self.assertTrue(random_perm(User.objects.get(pk=user.pk), obj='a'))
+            self.assertEqual(len(scope), 1)
+
+            # Nested scopes start out empty.
+            with permission_cache_scope():
+                self.assertFalse(random_perm(user, obj='a'))
+
+            self.assertTrue(random_perm(user, obj='a'))
+
+        # Nothing was attached to the user itself.
+        self.assertNotIn('_dlp_cache', vars(user))
+        self.assertFalse(random_perm(user, obj='a'))
+        self.assertIn('_dlp_cache', vars(user))
+
+    def test_threaded_user_cache(self):
+        """
+        Tests whether threads sharing a user object all get the same cache.
+        """
+        user = AnonymousUser()
+        user_caches = []
+
+        threads = [threading.Thread(target=lambda: user_caches.append(get_user_cache(user))) for _ in range(8)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(set(id(cache) for cache in user_caches)), 1)
+
+    def test_object_keys(self):
+        """
+        Tests whether stable cache keys are derived from objects.
+        """
+        user = User.objects.create(username=uuid.uuid4())
+
+        # Separately fetched instances of the same row share the same key.
+        self.assertEqual(get_object_key(user), get_object_key(User(pk=user.pk)))
+        self.assertEqual(get_object_key(User.objects.get(pk=user.pk)), get_object_key(user))
+
+        # Collections are keyed by their contents.
+        self.assertEqual(get_object_key([user, 'a']), (get_object_key(user), 'a'))
+
+        # Model instances don't share their keys with tuples of the same values.
+        self.assertNotEqual(get_object_key(user), get_object_key(('auth', 'user', user.pk)))
+        self.assertTrue(is_stable_key(get_object_key(user)))
+        self.assertEqual(get_object_key({'b': 2, 'a': 1}), get_object_key({'a': 1, 'b': 2}))
+        self.assertEqual(get_object_key({1, 2}), get_object_key({2, 1}))
+
+        # Unsaved instances and unhashable objects can't be cached.
+        self.assertIs(get_object_key(User()), UNCACHEABLE)
+        self.assertIs(get_object_key([User()]), UNCACHEABLE)
+        self.assertIs(get_object_key(bytearray()), UNCACHEABLE)
+
+    def test_permission_cache_key(self):
+        """
+        Tests whether permissions are cached under their custom cache keys.
+        """
+        calls = []
+
+        @permission
+        def perm_owner(user, obj=None):
+            calls.append(obj)
+            return obj['owner'] == 'me'
+
+        user = AnonymousUser()
+
+        # Plain dicts are cached by their contents.
+        self.assertTrue(perm_owner(user, {'owner': 'me'}))
+        self.assertTrue(perm_owner(user, {'owner': 'me'}))
+        self.assertEqual(len(calls), 1)
+
+        # Unsaved instances are evaluated without caching.
+        @permission
+        def perm_unsaved(user, obj=None):
+            return obj.pk is None
+
+        self.assertTrue(perm_unsaved(user, User()))
+        self.assertEqual(len(get_user_cache(user)), 1)
+
+        # Permissions may map objects onto a key of their own.
+        perm_owner.cache_key = lambda user, obj=None: obj['owner']
+
+        self.assertTrue(perm_owner(user, {'owner': 'me', 'name': 'a'}))
+        self.assertTrue(perm_owner(user, {'owner': 'me', 'name': 'b'}))
+        self.assertEqual(len(calls), 2)
+
+    def test_object_references(self):
+        """
+        Tests whether cached decisions keep the objects they were made for alive.
+        """
+        class Document(object):
+            pass
+
+        perm = SimplePermission()
+        user = AnonymousUser()
+        document = Document()
+
+        self.assertTrue(perm(user, document))
+        self.assertTrue(perm(user, 'a'))
+
+        report = get_cache_report(user)
+        self.assertEqual(report['entries'], 2)
+        self.assertEqual(report['strong_references'], 1)
+        self.assertGreater(report['bytes'], 0)
+
+        with override_settings(PERMISSIONS_CACHE_OBJECT_REFERENCES='weak'):
+            user = AnonymousUser()
+            self.assertIsInstance(get_object_key(document), WeakObjectKey)
+            self.assertEqual(get_object_key(document), get_object_key(document))
+            self.assertNotEqual(get_object_key(document), get_object_key(Document()))
+
+            # Objects that define their own equality are still keyed by themselves.
+            self.assertEqual(get_object_key(user), get_object_key(AnonymousUser()))
+
+            self.assertTrue(perm(user, document))
+            self.assertTrue(perm(user, document))
+            self.assertTrue(perm(user, Document()))
+            self.assertEqual(get_cache_report(user)['weak_references'], 1)
+
+            del document
+            gc.collect()
+
+            report = get_cache_report(user)
+            self.assertEqual(report['entries'], 2)
+            self.assertEqual(report['weak_references'], 0)
+            self.assertEqual(report['dead_references'], 2)
+
+            # The decisions for collected objects are dropped once another one is cached.
+            self.assertTrue(perm(user, 'b'))
+
+            report = get_cache_report(user)
+            self.assertEqual(report['entries'], 1)
+            self.assertEqual(report['dead_references'], 0)
+
+        with override_settings(PERMISSIONS_CACHE_OBJECT_REFERENCES='none'):
+            self.assertIs(get_object_key(Document()), UNCACHEABLE)
+            self.assertEqual(get_object_key([1, 'a']), (1, 'a'))
+
+
+@override_settings(PERMISSIONS_SHARED_CACHE='default')
+class SharedPermissionCacheTestCase(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+
+    def register(self, perm):
+        # Only the decisions of registered permissions are shared.
+        default_storage.register(perm)
+        self.addCleanup(default_storage.unregister, perm.label)
+        return perm
+
+    def test_shared_cache(self):
+        """
+        Tests whether decisions are shared between separately fetched users.
+        """
+        random_perm = self.register(ChangingPermission())
+        user = User.objects.create(username=uuid.uuid4())
+
+        random_perm.set_result('a', True)
+        self.assertTrue(random_perm(user, obj='a'))
+
+        # Re-fetching the user clears its own cache, but the decision
+        # is still available in the shared cache.
+        random_perm.set_result('a', False)
+        user = User.objects.get(pk=user.pk)
+
+        self.assertTrue(random_perm(user, obj='a'))
+
+        # Anonymous users and objects without a stable identity
+        # are never shared.
+        shared_cache = get_shared_cache()
+
+        self.assertIsNone(shared_cache.make_key(random_perm, AnonymousUser(), 'a'))
+        self.assertIsNone(shared_cache.make_key(random_perm, user, get_object_key(object())))
+        self.assertIsNotNone(shared_cache.make_key(random_perm, user, get_object_key(user)))
+
+        # Clearing the shared cache makes the permission evaluate again.
+        caches['default'].clear()
+        user = User.objects.get(pk=user.pk)
+
+        self.assertFalse(random_perm(user, obj='a'))
+
+    def test_shared_cache_ttl(self):
+        """
+        Tests whether permissions can set their own shared cache timeout.
+        """
+        random_perm = self.register(ChangingPermission())
+        random_perm.shared_cache_ttl = 0
+        user = User.objects.create(username=uuid.uuid4())
+
+        random_perm.set_result('a', True)
+        self.assertTrue(random_perm(user, obj='a'))
+
+        # The decision expired immediately from the shared cache.
+        random_perm.set_result('a', False)
+        user = User.objects.get(pk=user.pk)
+
+        self.assertFalse(random_perm(user, obj='a'))
+
+    def test_shared_cache_generations(self):
+        """
+        Tests whether shared decisions are invalidated by incrementing generations.
+        """
+        random_perm = self.register(ChangingPermission())
+        combined = random_perm & SimplePermission()
+        combined.label = 'tests.combined'
+        self.register(combined)
+
+        user = User.objects.create(username=uuid.uuid4())
+        other_user = User.objects.create(username=uuid.uuid4())
+
+        def refetch(instance):
+            return User.objects.get(pk=instance.pk)
+
+        random_perm.set_result('a', True)
+        self.assertTrue(random_perm(user, obj='a'))
+        self.assertTrue(random_perm(other_user, obj='a'))
+        self.assertTrue(combined(other_user, obj='a'))
+
+        random_perm.set_result('a', False)
+
+        # Only the generation of the user is incremented.
+        invalidate(user=user)
+        self.assertFalse(random_perm(refetch(user), obj='a'))
+        self.assertTrue(random_perm(refetch(other_user), obj='a'))
+
+        # Incrementing the generation of a permission invalidates the
+        # combined permissions containing it too.
+        invalidate(permission=random_perm)
+        other_user = refetch(other_user)
+        self.assertFalse(random_perm(other_user, obj='a'))
+        self.assertFalse(combined(other_user, obj='a'))
+
+        random_perm.set_result('a', True)
+        invalidate()
+        self.assertTrue(random_perm(refetch(user), obj='a'))
+
+        # A generation that's evicted from the cache starts a new one.
+        shared_cache = get_shared_cache()
+        random_perm.set_result('a', False)
+        caches['default'].delete(shared_cache.get_generation_keys(random_perm, user)[1])
+
+        self.assertFalse(random_perm(refetch(user), obj='a'))
+
+    def test_shared_cache_policy(self):
+        """
+        Tests whether permissions can keep their decisions out of the shared cache or share them between users.
+        """
+        calls = []
+
+        @permission(cache='request')
+        def request_permission(user, obj=None):
+            calls.append('request')
+            return True
+
+        @permission(key=lambda user, obj: (user.is_staff, obj))
+        def projected_permission(user, obj=None):
+            calls.append('projected')
+            return not user.is_staff
+
+        self.register(request_permission)
+        self.register(projected_permission)
+        user = User.objects.create(username=uuid.uuid4())
+        other_user = User.objects.create(username=uuid.uuid4())
+        staff_user = User.objects.create(username=uuid.uuid4(), is_staff=True)
+
+        self.assertTrue(request_permission(user))
+        self.assertTrue(request_permission(User.objects.get(pk=user.pk)))
+        self.assertEqual(calls, ['request', 'request'])
+
+        # Users with the same projection share the decision.
+        self.assertTrue(projected_permission(user, 'a'))
+        self.assertTrue(projected_permission(other_user, 'a'))
+        self.assertFalse(projected_permission(staff_user, 'a'))
+        self.assertEqual(calls, ['request', 'request', 'projected', 'projected'])
+
+    def test_stale_while_revalidate(self):
+        """
+        Tests whether expired decisions are served during the grace period while a single refresh runs.
+        """
+        calls = []
+        refreshing = threading.Event()
+        results = {'a': True}
+
+        @permission(stale_grace=60)
+        def slow_permission(user, obj=None):
+            calls.append(obj)
+
+            if len(calls) > 1:
+                refreshing.wait(5)
+
+            return results[obj]
+
+        slow_permission.shared_cache_ttl = 0
+        self.register(slow_permission)
+        user = User.objects.create(username=uuid.uuid4())
+
+        self.assertTrue(slow_permission(user, 'a'))
+
+        # The decision expired immediately, but it's still served while a
+        # single refresh runs in the background.
+        results['a'] = False
+
+        for _ in range(3):
+            self.assertTrue(slow_permission(User.objects.get(pk=user.pk), 'a'))
+
+        refreshing.set()
+        shutdown_executor()
+
+        self.assertEqual(calls, ['a', 'a'])
+        self.assertFalse(slow_permission(User.objects.get(pk=user.pk), 'a'))
+
+    def test_failed_refresh(self):
+        """
+        Tests whether failed refreshes are logged and retried, and keep serving the stale decision.
+        """
+        calls = []
+
+        @permission(stale_grace=60)
+        def failing_permission(user, obj=None):
+            calls.append(obj)
+
+            if len(calls) > 1:
+                raise ValueError('Nope')
+
+            return True
+
+        failing_permission.shared_cache_ttl = 0
+        self.register(failing_permission)
+        user = User.objects.create(username=uuid.uuid4())
+
+        self.assertTrue(failing_permission(user, 'a'))
+
+        for _ in range(2):
+            with self.assertLogs('django_logical_perms.caches', 'ERROR') as logs:
+                self.assertTrue(failing_permission(User.objects.get(pk=user.pk), 'a'))
+                shutdown_executor()
+
+            self.assertIn('ValueError: Nope', logs.output[0])
+
+        self.assertEqual(calls, ['a', 'a', 'a'])
+
+    def test_failed_refresh_submission(self):
+        """
+        Tests whether a refresh that can't be submitted can be retried.
+        """
+        calls = []
+
+        @permission(stale_grace=60)
+        def stale_permission(user, obj=None):
+            calls.append(obj)
+            return True
+
+        def submit(func, *args):
+            raise RuntimeError('Nope')
+
+        stale_permission.shared_cache_ttl = 0
+        self.register(stale_permission)
+        user = User.objects.create(username=uuid.uuid4())
+
+        self.assertTrue(stale_permission(user, 'a'))
+
+        original_submit, parallel.submit = parallel.submit, submit
+
+        try:
+            with self.assertRaises(RuntimeError):
+                stale_permission(User.objects.get(pk=user.pk), 'a')
+        finally:
+            parallel.submit = original_submit
+
+        self.assertTrue(stale_permission(User.objects.get(pk=user.pk), 'a'))
+        shutdown_executor()
+
+        self.assertEqual(calls, ['a', 'a'])
+
+    def test_unregistered_permissions(self):
+        """
+        Tests whether unregistered permissions with the same label don't share their decisions.
+        """
+        def make_owner_permission(owner):
+            def check(user, obj=None):
+                return obj == owner
+
+            return permission(check)
+
+        is_a, is_b = make_owner_permission('a'), make_owner_permission('b')
+        user = User.objects.create(username=uuid.uuid4())
+
+        self.assertEqual(is_a.label, is_b.label)
+        self.assertTrue(is_a(user, 'a'))
+        self.assertFalse(is_b(User.objects.get(pk=user.pk), 'a'))
+
+    @override_settings(PERMISSIONS_SHARED_CACHE=None)
+    def test_shared_cache_disabled(self):
+        """
+        Tests whether the shared cache is disabled by default.
+        """
+        self.assertIsNone(get_shared_cache())
+
+
+class CacheInvalidationTestCase(TestCase):
+    def setUp(self):
+        self.random_perm = ChangingPermission()
+        self.random_perm.set_result('a', True)
+        self.random_perm.set_result('b', True)
+
+    def test_invalidate_user(self):
+        """
+        Tests whether the decisions of a user are invalidated, including other instances of the user.
+        """
+        user = User.objects.create(username=uuid.uuid4())
+        other_instance = User.objects.get(pk=user.pk)
+        other_user = User.objects.create(username=uuid.uuid4())
+
+        for instance in (user, other_instance, other_user):
+            self.assertTrue(self.random_perm(instance, obj='a'))
+
+        self.random_perm.set_result('a', False)
+        invalidate(user=user)
+
+        self.assertFalse(self.random_perm(user, obj='a'))
+        self.assertFalse(self.random_perm(other_instance, obj='a'))
+        self.assertTrue(self.random_perm(other_user, obj='a'))
+
+        invalidate()
+        self.assertFalse(self.random_perm(other_user, obj='a'))
+
+    def test_invalidate_permission(self):
+        """
+        Tests whether the decisions of a permission and the permissions containing it are invalidated.
+        """
+        user = AnonymousUser()
+        combined = self.random_perm | ~self.random_perm
+
+        self.assertTrue(self.random_perm(user, obj='a'))
+        self.assertTrue(self.random_perm(user, obj='b'))
+        self.assertTrue(combined.test(user, obj='b'))
+
+        self.random_perm.set_result('a', False)
+        self.random_perm.set_result('b', False)
+
+        # Only the decision for the given object is removed.
+        invalidate(permission=self.random_perm, obj='a')
+        self.assertFalse(self.random_perm(user, obj='a'))
+        self.assertTrue(self.random_perm(user, obj='b'))
+
+        # The decision of the combined permission is removed as well.
+        invalidate(user=user, permission=self.random_perm)
+        self.assertEqual(len(get_user_cache(user)), 0)
+        self.assertFalse(self.random_perm(user, obj='b'))
+
+    def test_invalidate_dependent_permissions(self):
+        """
+        Tests whether changing a model evicts the decisions of the permissions depending on it.
+        """
+        @permission(depends_on=[Group])
+        def user_is_editor(user, obj=None):
+            return user.groups.filter(name='editors').exists()
+
+        @permission(depends_on=['auth.Group'])
+        def editors_exist(user, obj=None):
+            return Group.objects.filter(name='editors').exists()
+
+        user = User.objects.create(username=uuid.uuid4())
+        combined = user_is_editor | self.random_perm
+
+        self.assertFalse(editors_exist(user))
+        self.assertFalse(user_is_editor(user))
+        self.assertTrue(combined.test(user, 'a'))
+        self.assertTrue(self.random_perm(user, 'a'))
+
+        group = Group.objects.create(name='editors')
+        self.assertTrue(editors_exist(user))
+        self.assertFalse(user_is_editor(user))
+
+        # Changing the relation between users and groups evicts the decisions too.
+        user.groups.add(group)
+        self.assertTrue(user_is_editor(user))
+
+        # Decisions of permissions that don't depend on groups are kept.
+        self.random_perm.set_result('a', False)
+        self.assertTrue(self.random_perm(user, 'a'))
+        self.assertEqual(len(get_user_cache(user)), 2)
+
+        group.delete()
+        self.assertFalse(editors_exist(user))
@@ -0,0 +1,129 @@
+import threading
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.test import override_settings, TestCase
+from django_logical_perms.coalescing import default_single_flight, get_coalescing_key, SingleFlight
+from django_logical_perms.decorators import permission
+from django_logical_perms.exceptions import EvaluationTimeout
+
+
+class SingleFlightTestCase(TestCase):
+    def setUp(self):
+        self.single_flight = SingleFlight()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = []
+
+    def slow_call(self, result):
+        self.calls.append(result)
+        self.started.set()
+        self.release.wait(5)
+
+        if isinstance(result, Exception):
+            raise result
+
+        return result
+
+    def wait_for_waiters(self, single_flight, key, count):
+        # Callers join the running call before waiting for it, so the
+        # release can't happen before they're waiting.
+        deadline = time.time() + 5
+
+        while single_flight.get_waiters(key) < count:
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.001)
+
+    def run_concurrently(self, result, waiters=3, timeout=None):
+        outcomes = []
+
+        def call():
+            try:
+                outcomes.append(self.single_flight.do('key', self.slow_call, result, timeout=timeout))
+            except Exception as error:
+                outcomes.append(error)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        self.started.wait(5)
+
+        threads = [threading.Thread(target=call) for _ in range(waiters)]
+
+        for thread in threads:
+            thread.start()
+
+        self.wait_for_waiters(self.single_flight, 'key', waiters)
+
+        if timeout is not None:
+            # The leader is still blocked, so waiting callers can only finish by timing out.
+            for thread in threads:
+                thread.join()
+
+        self.release.set()
+
+        for thread in threads + [leader]:
+            thread.join()
+
+        return outcomes
+
+    def test_coalesced_calls(self):
+        """
+        Tests whether concurrent calls with the same key share a single call.
+        """
+        self.assertEqual(self.run_concurrently(True), [True] * 4)
+        self.assertEqual(self.calls, [True])
+        self.assertEqual(len(self.single_flight), 0)
+
+    def test_coalesced_errors(self):
+        """
+        Tests whether the exception of the running call is raised for all callers.
+        """
+        error = ValueError('Nope')
+
+        self.assertEqual(self.run_concurrently(error), [error] * 4)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_coalesced_timeout(self):
+        """
+        Tests whether waiting callers time out.
+        """
+        outcomes = self.run_concurrently(True, waiters=1, timeout=0.01)
+
+        self.assertIsInstance(outcomes[0], EvaluationTimeout)
+        self.assertTrue(outcomes[1])
+
+    @override_settings(PERMISSIONS_COALESCE_EVALUATIONS=True)
+    def test_coalesced_permissions(self):
+        """
+        Tests whether concurrent evaluations of the same permission are coalesced.
+        """
+        @permission
+        def slow_permission(user, obj=None):
+            return self.slow_call(obj == 'yes')
+
+        user = User.objects.create(username=uuid.uuid4())
+        outcomes = []
+
+        # Every thread has its own instance of the user, so they don't share a cache.
+        users = [User.objects.get(pk=user.pk) for _ in range(3)]
+
+        threads = [
+            threading.Thread(target=lambda instance=instance: outcomes.append(slow_permission(instance, 'yes')))
+            for instance in users
+        ]
+
+        threads[0].start()
+        self.started.wait(5)
+
+        for thread in threads[1:]:
+            thread.start()
+
+        self.wait_for_waiters(default_single_flight, get_coalescing_key(slow_permission, user, 'yes'), 2)
+        self.release.set()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(outcomes, [True] * 3)
+        self.assertEqual(self.calls, [True])
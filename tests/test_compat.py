@@ -3,10 +3,11 @@ from unittest import skipIf
 
 from django import VERSION as DJANGO_VERSION
 from django.contrib.auth.models import AnonymousUser, User
-from django.test import TestCase
+from django.test import RequestFactory, TestCase
 from django.urls import reverse
 from django_logical_perms.decorators import permission
-from django_logical_perms.rest_framework.serializers import FieldPermissionsSerializer
+from django_logical_perms.rest_framework.serializers import FieldPermissionsListSerializer, FieldPermissionsSerializer
+from django_logical_perms.storages import default_storage
 from django_logical_perms.tastypie.authorization import DjangoObjectAuthorization
 
 from .api.rest_framework.serializers import UserSerializer
@@ -131,6 +132,25 @@ class RestFrameworkTestCase(TestCase):
         self.assertTrue('email' in resp.data[1])
         self.assertTrue('email' not in resp.data[2])
 
+    def test_list_serializer_prefetch(self):
+        """
+        Tests whether the list serializer evaluates the field permissions in bulk.
+        """
+        request = RequestFactory().get('/')
+        request.user = User.objects.get(username='user2')
+
+        serializer = UserSerializer(User.objects.order_by('pk'), many=True, context={'request': request})
+        self.assertIsInstance(serializer, FieldPermissionsListSerializer)
+
+        data = serializer.data
+
+        # The email permission has been evaluated for all users at once,
+        # before serializing the individual users: the combined permission
+        # and its left operand for all three users, the right operand for
+        # the two users that weren't decided yet.
+        self.assertEqual(len(request.user._dlp_cache), 8)
+        self.assertEqual(['email' in item for item in data], [True, True, False])
+
     def test_anonymous_serializer_change(self):
         """
         Tests whether field-based change permissions get correctly enforced on anonymous users.
@@ -400,3 +420,35 @@ class TastypieTestCase(TestCase):
         self.assertFalse(auth.check_user_perm(user, 'tests.tastypie_auth_test', None))
         self.assertTrue(auth.check_user_perm(user, 'tests.tastypie_auth_test', single_obj))
         self.assertTrue(auth.check_user_perm(user, 'tests.tastypie_auth_test', multiple_obj))
+
+    def test_object_authorization_prefetch(self):
+        """
+        Tests whether list authorization stops evaluating objects at the first denial.
+        """
+        auth = DjangoObjectAuthorization()
+        auth.prefetch_batch_size = 2
+        objs = list(range(6))
+        calls = []
+
+        @permission(register=True, label='tests.tastypie_prefetch_test')
+        def tastypie_prefetch_test(user, obj=None):
+            calls.append(obj)
+            return obj is not None and obj != 2
+
+        self.addCleanup(default_storage.unregister, 'tests.tastypie_prefetch_test')
+
+        # Only the batches up to the denied object are evaluated.
+        self.assertFalse(auth.check_user_perm(AnonymousUser(), 'tests.tastypie_prefetch_test', objs))
+        self.assertEqual(calls, [None, 0, 1, 2, 3])
+
+        # None of the objects are evaluated if the model-level permission is granted.
+        @permission(register=True, label='tests.tastypie_model_prefetch_test')
+        def tastypie_model_prefetch_test(user, obj=None):
+            calls.append(obj)
+            return obj is None
+
+        self.addCleanup(default_storage.unregister, 'tests.tastypie_model_prefetch_test')
+        del calls[:]
+
+        self.assertTrue(auth.check_user_perm(AnonymousUser(), 'tests.tastypie_model_prefetch_test', objs))
+        self.assertEqual(calls, [None])
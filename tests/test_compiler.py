@@ -0,0 +1,90 @@
+import itertools
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import override_settings, TestCase
+from django_logical_perms.compiler import compile_permission, PermissionCompiler
+from django_logical_perms.exceptions import CompiledPermissionMismatch
+from django_logical_perms.permissions import at_least
+from django_logical_perms.storages import default_storage
+
+from .permissions import make_perm
+
+
+class PermissionCompilerTestCase(TestCase):
+    def setUp(self):
+        self.results = {}
+        self.calls = []
+
+    def get_result(self, name):
+        return self.results[name]
+
+    def test_compiled_permission(self):
+        """
+        Tests whether compiled permissions match the interpreted permissions for all inputs.
+        """
+        a, b, c, d = [make_perm(name, self.get_result, self.calls) for name in 'abcd']
+
+        expressions = (
+            a | b | c,
+            a & b & ~c,
+            a ^ b ^ c,
+            (a & b) | (c & d) | ~(a | d),
+            at_least(2, a, b, c, d) & ~(b ^ c),
+        )
+
+        for values in itertools.product((True, False), repeat=4):
+            self.results = dict(zip('abcd', values))
+
+            for expression in expressions:
+                expected = type(expression).has_permission(expression, AnonymousUser())
+                compiled = compile_permission(expression)
+
+                self.assertEqual(compiled(AnonymousUser()), expected, msg=repr(expression))
+
+    def test_shared_subexpressions(self):
+        """
+        Tests whether shared subexpressions are only evaluated once.
+        """
+        a, b, c = [make_perm(name, self.get_result, self.calls) for name in 'abc']
+        self.results = {'a': True, 'b': True, 'c': False}
+
+        shared = a & b
+        expression = (shared | c) & (c | shared) & ~c
+
+        # The shared subexpression and the repeated leaf both get a memo
+        # variable, so every leaf is looked up once.
+        source = PermissionCompiler(expression).get_source()
+        self.assertEqual(source.count('= None'), 2)
+
+        user = AnonymousUser()
+        self.assertTrue(expression.compile()(user))
+        self.assertTrue(expression.compiled)
+        self.assertEqual(sorted(self.calls), ['a', 'b', 'c'])
+
+    def test_verify_compiled_permission(self):
+        """
+        Tests whether the differential mode detects mismatching compiled permissions.
+        """
+        a, b = make_perm('a', self.get_result, self.calls), make_perm('b', self.get_result, self.calls)
+        self.results = {'a': True, 'b': False}
+        expression = a | b
+
+        with override_settings(PERMISSIONS_COMPILE_VERIFY=True):
+            verified = compile_permission(expression)
+
+        self.assertTrue(verified(AnonymousUser()))
+
+        # Tamper with the expression after compiling it.
+        expression.operands = (b,)
+
+        with self.assertRaises(CompiledPermissionMismatch):
+            verified(AnonymousUser())
+
+    def test_registered_permissions_compiled(self):
+        """
+        Tests whether registered composite permissions are compiled when the app is ready.
+        """
+        perm = default_storage.get_permission('tests.composite_permission')
+
+        self.assertTrue(perm.compiled)
+        self.assertFalse(perm(AnonymousUser()))
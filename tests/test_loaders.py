@@ -1,5 +1,21 @@
-from django.test import TestCase
-from django_logical_perms.loaders import load_all_permissions_modules
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from django.apps import apps
+from django.core.management import call_command, CommandError
+from django.test import override_settings, TestCase
+from django_logical_perms.caches import get_permission_id
+from django_logical_perms.loaders import has_permissions_module, load_all_permissions_modules, read_manifest
+from django_logical_perms.permissions import FunctionalLogicalPermission
+from django_logical_perms.storages import default_storage
 
 
 class PermissionLoaderTestCase(TestCase):
@@ -8,13 +24,36 @@ class PermissionLoaderTestCase(TestCase):
         Tests whether the loader successfully loads all permission modules.
         """
         loaded_apps = [
-            app_config.name
-            for app_config, success
+            load.app_config.name
+            for load
             in load_all_permissions_modules(yield_loads=True)
-            if success]
+            if load.success]
 
         self.assertEqual(loaded_apps, ['tests', 'tests.api'])
 
+    def test_permission_loader_report(self):
+        """
+        Tests whether the import time and the number of registered permissions are reported per app.
+        """
+        config = apps.get_app_config('django_logical_perms')
+        loads = dict((load.app_config.name, load) for load in config.permissions_module_loads)
+
+        self.assertEqual(loads['tests'].count, 2)
+        self.assertGreater(loads['tests'].duration, 0)
+        self.assertFalse(loads['django.contrib.sessions'].success)
+
+        out = StringIO()
+        call_command('permissions_startup_report', stdout=out)
+
+        self.assertIn('tests.api', out.getvalue())
+        self.assertIn('Total', out.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command('permissions_startup_report', budget=0, stdout=StringIO())
+
+        with self.assertRaises(CommandError):
+            call_command('permissions_startup_report', module_budget=0, stdout=StringIO())
+
     def test_permission_loader_without_yield(self):
         """
         Tests whether the loader silently loads all permissions modules if `yield_loads` isn't set.
@@ -23,3 +62,75 @@ class PermissionLoaderTestCase(TestCase):
         # explicitly set the yield_loads parameter.
         loaded_apps = [x for x in load_all_permissions_modules()]
         self.assertEqual(loaded_apps, [])
+
+    def test_has_permissions_module(self):
+        """
+        Tests whether permissions modules are found without importing them.
+        """
+        self.assertTrue(has_permissions_module(apps.get_app_config('tests')))
+        self.assertFalse(has_permissions_module(apps.get_app_config('sessions')))
+
+    def test_permissions_manifest(self):
+        """
+        Tests whether the manifest maps permission labels onto the modules that register them.
+        """
+        out = StringIO()
+
+        with override_settings(PERMISSIONS_MANIFEST=None):
+            call_command('permissions_manifest', stdout=out)
+            self.assertIsNone(read_manifest())
+
+        manifest = json.loads(out.getvalue())
+        self.assertEqual(manifest['tests.registered_permission'], 'tests.permissions')
+        self.assertEqual(manifest['tests.composite_permission'], 'tests.permissions')
+
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'manifest.json')
+
+        try:
+            with override_settings(PERMISSIONS_MANIFEST=path):
+                self.assertIsNone(read_manifest())
+
+                call_command('permissions_manifest', stdout=StringIO())
+                self.assertEqual(read_manifest(), manifest)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_lazy_loading(self):
+        """
+        Tests whether permissions modules are only imported once one of their permissions is looked up.
+        """
+        pending, lazy = dict(default_storage._pending), default_storage.lazy
+        default_storage.load_lazily({'tests.lazy_permission': 'tests.lazy_permissions'})
+
+        def restore():
+            default_storage._pending, default_storage.lazy = pending, lazy
+
+            # Allow the module to be imported and register its permission again.
+            sys.modules.pop('tests.lazy_permissions', None)
+
+        self.addCleanup(restore)
+
+        self.assertNotIn('tests.lazy_permissions', sys.modules)
+        self.assertIn('tests.lazy_permission', default_storage)
+        self.assertNotIn('tests.lazy_permission', default_storage.get_loaded_permissions())
+
+        permission = default_storage.get_permission('tests.lazy_permission')
+        self.addCleanup(default_storage.unregister, 'tests.lazy_permission')
+
+        self.assertIn('tests.lazy_permissions', sys.modules)
+        self.assertIsNotNone(get_permission_id(permission))
+        self.assertEqual(default_storage.get_manifest()['tests.lazy_permission'], 'tests.lazy_permissions')
+
+        # Loading the module again still reports its permissions.
+        self.assertEqual(list(default_storage.load_module('tests.lazy_permissions')), ['tests.lazy_permission'])
+
+        # Permissions that are registered otherwise are prepared too.
+        permission = FunctionalLogicalPermission(lambda user, obj=None: True, label='tests.directly_registered')
+        default_storage.register(permission)
+        self.addCleanup(default_storage.unregister, 'tests.directly_registered')
+        self.assertIsNone(get_permission_id(permission))
+        self.assertNotIn('tests.directly_registered', default_storage.get_manifest())
+
+        self.assertEqual(default_storage.get_permission('tests.directly_registered'), permission)
+        self.assertIsNotNone(get_permission_id(permission))
@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import override_settings, TestCase
+from django_logical_perms.ordering import (
+    configure_operand_ordering,
+    configure_operand_ordering_from_settings,
+    default_statistics,
+    dump_statistics,
+    get_operand_ordering_settings,
+    get_statistics_key,
+    load_statistics,
+    OperandStatistics,
+    reorder_operands,
+)
+
+from .permissions import make_perm
+
+
+class OperandOrderingTestCase(TestCase):
+    def setUp(self):
+        self.calls = []
+
+    def test_static_ordering(self):
+        """
+        Tests whether operands are reordered by their cost and decisiveness.
+        """
+        slow, cheap = make_perm('slow', True, self.calls), make_perm('cheap', True, self.calls)
+
+        statistics = {
+            'slow': OperandStatistics(evaluations=10, granted=5, total_time=1.0),
+            'cheap': OperandStatistics(evaluations=10, granted=9, total_time=0.01),
+        }
+
+        # The cheap permission usually grants, so it should go first in Or.
+        perm_or = slow | cheap
+        self.assertTrue(reorder_operands(perm_or, statistics))
+        self.assertEqual(perm_or.operands, (cheap, slow))
+        self.assertTrue(perm_or(AnonymousUser()))
+        self.assertEqual(self.calls, ['cheap'])
+
+        # Nested permissions are reordered as well.
+        perm = (slow | cheap) & cheap
+        configure_operand_ordering([perm], 'static', statistics)
+        self.assertEqual(perm.operands[0].operands, (cheap, slow))
+
+        # Without statistics for all operands, the order is kept.
+        unknown = make_perm('unknown', True, self.calls)
+        self.assertFalse(reorder_operands(slow | unknown, statistics))
+
+        # Order-sensitive operands are never moved.
+        side_effect = make_perm('side_effect', True, self.calls, order_sensitive=True)
+        statistics['side_effect'] = OperandStatistics(evaluations=1, granted=0, total_time=10.0)
+        perm = side_effect | cheap
+
+        self.assertTrue(perm.order_sensitive)
+        self.assertFalse(reorder_operands(perm, statistics))
+        self.assertEqual(perm.operands, (side_effect, cheap))
+
+        with self.assertRaises(ValueError):
+            configure_operand_ordering([perm], 'random')
+
+    def test_adaptive_ordering(self):
+        """
+        Tests whether operands are reordered while evaluating in adaptive mode.
+        """
+        deny, grant = make_perm('deny', False, self.calls, delay=0.01), make_perm('grant', True, self.calls)
+        perm = deny | grant
+        statistics = {}
+
+        configure_operand_ordering([perm], 'adaptive', statistics, interval=2)
+
+        self.assertTrue(perm.has_permission(AnonymousUser()))
+        self.assertTrue(perm.has_permission(AnonymousUser()))
+
+        # After two evaluations, the granting permission goes first.
+        self.assertEqual(perm.operands, (grant, deny))
+        self.assertEqual(repr(perm), 'Or<LogicalPermission(grant), LogicalPermission(deny)>')
+
+        # Nested unlabeled permissions keep their statistics when they're reordered.
+        nested = (deny | grant) & make_perm('check', True, self.calls)
+        key = get_statistics_key(nested.operands[0])
+
+        self.assertTrue(reorder_operands(nested.operands[0], default_statistics))
+        self.assertEqual(get_statistics_key(nested.operands[0]), key)
+        self.assertEqual(key, 'Or<deny, grant>')
+
+    def test_statistics_file(self):
+        """
+        Tests whether statistics can be written to and read from a file.
+        """
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'stats.json')
+
+        try:
+            dump_statistics(path, {'perm': OperandStatistics(evaluations=4, granted=1, total_time=0.5)})
+            statistics = load_statistics(path)
+
+            with override_settings(PERMISSIONS_OPERAND_ORDERING='adaptive', PERMISSIONS_OPERAND_STATISTICS_FILE=path):
+                ordering_settings = get_operand_ordering_settings()
+        finally:
+            shutil.rmtree(directory)
+
+        self.addCleanup(default_statistics.pop, 'perm', None)
+
+        self.assertEqual(statistics['perm'].evaluations, 4)
+        self.assertEqual(statistics['perm'].cost, 0.125)
+        self.assertEqual(statistics['perm'].grant_rate, 1.0 / 3)
+
+        # The statistics in the file are added once, so later preparations
+        # keep the statistics collected in this process.
+        self.assertIs(ordering_settings[1], default_statistics)
+        default_statistics['perm'].record(0.5, True)
+
+        perm = make_perm('deny', False, self.calls) | make_perm('grant', True, self.calls)
+        self.assertEqual(configure_operand_ordering_from_settings([perm], ordering_settings), 'adaptive')
+        self.assertEqual(default_statistics['perm'].evaluations, 5)
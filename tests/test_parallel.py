@@ -0,0 +1,116 @@
+import operator
+import threading
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import override_settings, TestCase
+from django_logical_perms.caches import get_user_cache
+from django_logical_perms.compiler import PermissionCompiler
+from django_logical_perms.parallel import shutdown_executor
+from django_logical_perms.permissions import FunctionalLogicalPermission
+
+from .permissions import make_perm
+
+
+class ParallelEvaluationTestCase(TestCase):
+    def setUp(self):
+        self.calls = []
+        self.event = threading.Event()
+
+    def tearDown(self):
+        shutdown_executor()
+
+    def test_parallel_evaluation(self):
+        """
+        Tests whether operands are evaluated concurrently.
+        """
+        def wait_check(user, obj=None):
+            # This would time out if the operands were evaluated in sequence.
+            return self.event.wait(5)
+
+        def set_check(user, obj=None):
+            self.event.set()
+            return True
+
+        waiting = FunctionalLogicalPermission(wait_check, label='waiting')
+        setting = FunctionalLogicalPermission(set_check, label='setting')
+        perm = (waiting & setting).parallelize()
+        user = AnonymousUser()
+
+        self.assertTrue(perm.parallel)
+        self.assertTrue(perm(user))
+
+        # The decisions of the operands are cached from the worker threads.
+        cache = get_user_cache(user)
+        self.assertTrue(cache.get((waiting, None)))
+        self.assertTrue(cache.get((setting, None)))
+
+    def test_parallel_short_circuit(self):
+        """
+        Tests whether the outcome is returned as soon as it's decided.
+        """
+        def assert_short_circuit(combine, slow_result, fast_result):
+            returned, finished = threading.Event(), threading.Event()
+            calls = []
+
+            def slow_check(user, obj=None):
+                # The slow operand only finishes once the outcome has been returned.
+                returned.wait(5)
+                calls.append('slow')
+                finished.set()
+                return slow_result
+
+            slow = FunctionalLogicalPermission(slow_check, label='slow')
+            perm = combine(slow, make_perm('fast', fast_result, calls)).parallelize()
+
+            self.assertEqual(perm(AnonymousUser()), fast_result)
+            calls.append('returned')
+            returned.set()
+
+            self.assertTrue(finished.wait(5))
+            self.assertEqual(calls, ['fast', 'returned', 'slow'])
+
+        assert_short_circuit(operator.or_, False, True)
+        assert_short_circuit(operator.and_, True, False)
+
+        # Without a decisive operand, all operands have to be evaluated.
+        perm = (make_perm('a', False, self.calls) | make_perm('b', False, self.calls)).parallelize()
+        self.assertFalse(perm(AnonymousUser()))
+
+    @override_settings(PERMISSIONS_PARALLEL_MAX_WORKERS=1)
+    def test_nested_parallel_evaluation(self):
+        """
+        Tests whether nested parallel permissions don't exhaust the thread pool.
+        """
+        shutdown_executor()
+
+        inner = (make_perm('a', False, self.calls) | make_perm('b', True, self.calls)).parallelize()
+        perm = (inner & make_perm('c', True, self.calls)).parallelize()
+
+        self.assertTrue(perm(AnonymousUser()))
+        self.assertEqual(sorted(self.calls), ['a', 'b', 'c'])
+
+    def test_parallelize_errors(self):
+        """
+        Tests whether only suitable permissions can be evaluated in parallel.
+        """
+        a, b = make_perm('a', True, self.calls), make_perm('b', True, self.calls)
+
+        with self.assertRaises(ValueError):
+            (a ^ b).parallelize()
+
+        with self.assertRaises(ValueError):
+            (a | make_perm('side_effect', True, self.calls, order_sensitive=True)).parallelize()
+
+        with self.assertRaises(ValueError):
+            (a | b).parallelize().compile()
+
+    def test_compiled_parallel_subexpression(self):
+        """
+        Tests whether compiled permissions evaluate parallel subexpressions as a whole.
+        """
+        a, b, c = make_perm('a', True, self.calls), make_perm('b', False, self.calls), make_perm('c', True, self.calls)
+        inner = (a | b).parallelize()
+        perm = inner & c
+
+        self.assertEqual(PermissionCompiler(perm).get_source().count('(user, obj)'), 2)
+        self.assertTrue(perm.compile()(AnonymousUser()))
@@ -1,11 +1,19 @@
 import uuid
 
 from django.contrib.auth.models import AnonymousUser, Permission, User
-from django.test import TestCase
+from django.core.exceptions import PermissionDenied
+from django.db.models import Q
+from django.test import override_settings, TestCase
 from django_logical_perms.backends import LogicalPermissionsBackend
+from django_logical_perms.caches import get_permission_id, invalidate
 from django_logical_perms.decorators import permission
-from django_logical_perms.exceptions import PermissionNotFound
+from django_logical_perms.exceptions import PermissionNotFound, PermissionNotTranslatable
 from django_logical_perms.permissions import (
+    all_of,
+    AllOf,
+    any_of,
+    AnyOf,
+    at_least,
     BaseLogicalPermission,
     FunctionalLogicalPermission,
     has_perm,
@@ -15,6 +23,7 @@ from django_logical_perms.storages import default_storage, PermissionStorage
 
 from .permissions import (
     ChangingPermission,
+    make_perm,
     registered_permission,
     simple_decorated_permission,
     simple_labeled_permission,
@@ -178,6 +187,34 @@ class PermissionsTestCase(TestCase):
         with self.assertRaises(ValueError):
             storage.register(perm, label='blep')
 
+    def test_frozen_storage(self):
+        """
+        Tests whether permissions can't be registered with a frozen storage.
+        """
+        storage = PermissionStorage()
+        perm = FunctionalLogicalPermission(lambda user, obj=None: True, label='demo')
+        composite = perm & ~perm
+        storage.register(perm)
+        storage.register(composite, label='demo_composite')
+
+        storage.freeze()
+        storage.freeze()
+
+        # Freezing prepares the permissions that haven't been prepared yet.
+        self.assertTrue(storage.frozen)
+        self.assertTrue(composite.compiled)
+        self.assertEqual(storage.get_permission('demo'), perm)
+        self.assertIsNotNone(get_permission_id(perm))
+
+        with self.assertRaises(ValueError):
+            storage.register(perm, label='blep')
+
+        with self.assertRaises(TypeError):
+            storage.get_all_permissions()['blep'] = perm
+
+        with self.assertRaises(PermissionNotFound):
+            storage.get_permission('blep')
+
     def test_decorated_permission(self):
         """
         Tests the permission decorator: its output, its evaluators, its label and the ability to auto-register.
@@ -249,6 +286,94 @@ class PermissionsTestCase(TestCase):
         # we don't authenticate users.
         self.assertIsNone(LogicalPermissionsBackend().authenticate())
 
+    def test_label_prefixes(self):
+        """
+        Tests whether labels of other permissions are rejected without looking them up.
+        """
+        user = AnonymousUser()
+
+        self.assertIn('tests.registered_permission', default_storage)
+        self.assertNotIn('auth.add_user', default_storage)
+
+        backend = LogicalPermissionsBackend()
+
+        with override_settings(PERMISSIONS_LABEL_PREFIXES=['tests.registered_']):
+            self.assertTrue(user.has_perm('tests.registered_permission'))
+            self.assertIsNone(backend.get_logical_permission('tests.composite_permission'))
+
+        self.assertIsNotNone(backend.get_logical_permission('tests.composite_permission'))
+
+    def test_backend_batched_permissions(self):
+        """
+        Tests whether the backend checks many permissions at once and lists all granted permissions.
+        """
+        user = User.objects.create(username=uuid.uuid4())
+        backend = LogicalPermissionsBackend()
+        calls = []
+
+        @permission(label='tests.counted_permission', register=True)
+        def counted_permission(user, obj=None):
+            calls.append(obj)
+            return obj is None
+
+        @permission(label='tests.object_permission', register=True, scope='object')
+        def object_permission(user, obj=None):
+            return obj.startswith('o')
+
+        @permission(label='tests.uncached_permission', register=True, cache=None)
+        def uncached_permission(user, obj=None):
+            return results['uncached']
+
+        results = {'uncached': True}
+        self.addCleanup(default_storage.unregister, 'tests.counted_permission')
+        self.addCleanup(default_storage.unregister, 'tests.object_permission')
+        self.addCleanup(default_storage.unregister, 'tests.uncached_permission')
+
+        self.assertTrue(backend.has_perms(user, ['tests.registered_permission', 'tests.counted_permission']))
+        self.assertFalse(backend.has_perms(user, ['tests.composite_permission', 'tests.counted_permission']))
+        self.assertFalse(backend.has_perms(user, ['auth.add_user']))
+        self.assertEqual(len(calls), 1)
+
+        granted = user.get_all_permissions()
+        self.assertIn('tests.registered_permission', granted)
+        self.assertIn('tests.counted_permission', granted)
+        self.assertNotIn('tests.composite_permission', granted)
+
+        # Permissions that can't be evaluated without an object aren't granted.
+        self.assertNotIn('tests.object_permission', granted)
+        self.assertIn('tests.object_permission', backend.get_all_permissions(user, 'obj'))
+
+        self.assertNotIn('tests.counted_permission', backend.get_all_permissions(user, 'obj'))
+        self.assertFalse(backend.has_perms(user, ['tests.counted_permission'], 'obj'))
+        self.assertEqual(len(calls), 2)
+
+        # Invalidating a permission invalidates the cached labels as well.
+        invalidate(permission=counted_permission)
+
+        self.assertIn('tests.counted_permission', backend.get_all_permissions(user))
+        self.assertEqual(len(calls), 3)
+
+        # Permissions that aren't cached are evaluated every time.
+        self.assertIn('tests.uncached_permission', backend.get_all_permissions(user))
+        results['uncached'] = False
+
+        self.assertNotIn('tests.uncached_permission', backend.get_all_permissions(user))
+        self.assertFalse(backend.has_perms(user, ['tests.uncached_permission']))
+
+        with self.assertRaises(PermissionDenied):
+            backend.has_perm(user, 'tests.uncached_permission')
+
+        # Replacing a permission doesn't reuse the labels cached for the one it replaces.
+        default_storage.unregister('tests.object_permission')
+        default_storage.register(FunctionalLogicalPermission(
+            lambda user, obj=None: True, label='tests.object_permission', reads_object=False))
+
+        self.assertIn('tests.object_permission', backend.get_all_permissions(user))
+        self.assertTrue(backend.has_perms(user, ['tests.object_permission']))
+
+        with self.assertRaises(PermissionNotFound):
+            default_storage.unregister('tests.unknown_permission')
+
     def test_processed_permissions(self):
         """
         Tests logical expressions on permissions (AND, OR, XOR, NOT).
@@ -316,6 +441,244 @@ class PermissionsTestCase(TestCase):
         self.assertTrue(perm_no(user))
         self.assertTrue(perm(user))
 
+    def test_composite_permissions(self):
+        """
+        Tests whether combined permissions are flattened and short-circuited.
+        """
+        user = AnonymousUser()
+        calls = []
+
+        yes_a, yes_b, no_a, no_b = [
+            make_perm(name, name.startswith('yes'), calls, label='tests.{}'.format(name))
+            for name in ('yes_a', 'yes_b', 'no_a', 'no_b')]
+
+        # Chaining the same operator results in a single node.
+        perm = no_a | no_b | yes_a
+        self.assertIsInstance(perm, AnyOf)
+        self.assertEqual(perm.operands, (no_a, no_b, yes_a))
+        self.assertEqual(repr(perm), 'Or<LogicalPermission(tests.no_a), LogicalPermission(tests.no_b), '
+                                     'LogicalPermission(tests.yes_a)>')
+
+        # Mixing operators keeps the structure of the expression.
+        perm = (yes_a & yes_b) | no_a
+        self.assertIsInstance(perm.operands[0], AllOf)
+        self.assertEqual(repr(perm), 'Or<And<LogicalPermission(tests.yes_a), LogicalPermission(tests.yes_b)>, '
+                                     'LogicalPermission(tests.no_a)>')
+
+        # Evaluation stops as soon as the outcome is known.
+        self.assertTrue((yes_a | no_a | no_b)(user))
+        self.assertFalse((no_a & yes_a & yes_b)(user))
+        self.assertEqual(calls, ['yes_a', 'no_a'])
+
+        # The constructors build the same flattened nodes.
+        self.assertEqual(any_of(no_a, yes_a).operands, (no_a | yes_a).operands)
+        self.assertEqual(all_of(no_a, yes_a).operands, (no_a & yes_a).operands)
+        self.assertFalse(any_of()(user))
+        self.assertTrue(all_of()(user))
+
+        # At least a number of permissions should grant the permission.
+        user = AnonymousUser()
+        del calls[:]
+
+        self.assertTrue(at_least(2, yes_a, yes_b, no_a)(user))
+        self.assertEqual(calls, ['yes_a', 'yes_b'])
+        self.assertFalse(at_least(2, no_a, no_b, yes_a)(user))
+        self.assertEqual(calls, ['yes_a', 'yes_b', 'no_a', 'no_b'])
+        self.assertTrue(at_least(0, no_a)(user))
+        self.assertEqual(repr(at_least(1, yes_a)), 'AtLeast<1, LogicalPermission(tests.yes_a)>')
+
+        with self.assertRaises(ValueError):
+            at_least(-1, yes_a)
+
+        # Long chains don't nest and inverting twice gives back the original.
+        perms = [make_perm('chain_{}'.format(i), False, calls) for i in range(50)]
+        chain = perms[0]
+
+        for perm in perms[1:]:
+            chain = chain | perm
+
+        self.assertEqual(len(chain.operands), 50)
+        self.assertFalse(chain(user))
+        self.assertIs(~~yes_a, yes_a)
+
+        # Only permissions can be combined.
+        with self.assertRaises(ValueError):
+            yes_a | True
+
+    def test_bulk_permissions(self):
+        """
+        Tests evaluating permissions for many objects at once.
+        """
+        user = AnonymousUser()
+        calls = []
+
+        class EvenPermission(LogicalPermission):
+            def has_permission(self, user, obj=None):
+                return obj % 2 == 0
+
+            def has_permission_many(self, user, objs):
+                calls.append(list(objs))
+                return super(EvenPermission, self).has_permission_many(user, objs)
+
+        @permission
+        def perm_small(user, obj=None):
+            calls.append(obj)
+            return obj < 3
+
+        even = EvenPermission()
+
+        # Duplicates are only evaluated once.
+        self.assertEqual(even.test_many(user, [1, 2, 3, 2]), [False, True, False, True])
+        self.assertEqual(calls, [[1, 2, 3]])
+
+        # The decisions are cached for both single and bulk evaluations.
+        self.assertTrue(even(user, 2))
+        self.assertEqual(even.test_many(user, [2, 3, 4]), [True, False, True])
+        self.assertEqual(calls, [[1, 2, 3], [4]])
+
+        # The right operand is only evaluated for the undecided objects.
+        del calls[:]
+        self.assertEqual((even | perm_small).test_many(user, [1, 2, 5]), [True, True, False])
+        self.assertEqual(calls, [[5], 1, 5])
+
+        del calls[:]
+        self.assertEqual((even & perm_small).test_many(user, [4, 6, 8]), [False, False, False])
+        self.assertEqual(calls, [[6, 8], 4, 6, 8])
+
+        # All other combinations match the single evaluations.
+        objs = list(range(6))
+        expressions = (~even, even ^ perm_small, at_least(1, even, perm_small), at_least(2, even, perm_small))
+
+        for expression in expressions:
+            self.assertEqual(expression.test_many(AnonymousUser(), objs),
+                             [expression(AnonymousUser(), obj) for obj in objs])
+
+    def test_queryset_permissions(self):
+        """
+        Tests translating permissions into queryset filters.
+        """
+        staff = User.objects.create(username='staff', is_staff=True)
+        active = User.objects.create(username='active', is_active=True)
+        inactive = User.objects.create(username='inactive', is_active=False)
+
+        @permission(as_q=lambda user: Q(is_staff=True))
+        def obj_is_staff(user, obj=None):
+            return obj.is_staff
+
+        @permission(as_q=lambda user: Q(is_active=True))
+        def obj_is_active(user, obj=None):
+            return obj.is_active
+
+        @permission(as_q=lambda user: Q(pk=user.pk))
+        def obj_is_self(user, obj=None):
+            return obj == user
+
+        @permission
+        def untranslatable(user, obj=None):
+            return True
+
+        users = User.objects.filter(pk__in=[staff.pk, active.pk, inactive.pk])
+        expressions = (
+            obj_is_staff,
+            obj_is_staff | obj_is_self,
+            obj_is_active & ~obj_is_staff,
+            obj_is_active ^ obj_is_self,
+            at_least(2, obj_is_staff, obj_is_active, obj_is_self),
+            at_least(0, obj_is_staff),
+            any_of(),
+            ~all_of(),
+        )
+
+        # The filtered queryset should hold exactly the objects for which the
+        # permission would be granted.
+        for expression in expressions:
+            self.assertEqual(
+                set(expression.filter(inactive, users)),
+                set(obj for obj in users if expression(inactive, obj)), msg=repr(expression))
+
+        # Permissions can only be translated if all of their operands can.
+        with self.assertRaises(PermissionNotTranslatable):
+            untranslatable.filter(staff, users)
+
+        with self.assertRaises(PermissionNotTranslatable):
+            (obj_is_staff | untranslatable).as_q(staff)
+
+    def test_bound_permissions(self):
+        """
+        Tests specialising permissions for a single user.
+        """
+        calls = []
+
+        @permission(reads_object=False)
+        def user_is_staff(user, obj=None):
+            calls.append('staff')
+            return user.is_staff
+
+        @permission(reads_object=False)
+        def user_is_active(user, obj=None):
+            calls.append('active')
+            return user.is_active
+
+        @permission(as_q=lambda user: Q(is_active=True))
+        def obj_is_active(user, obj=None):
+            calls.append(obj)
+            return obj.is_active
+
+        perm = user_is_staff | (user_is_active & obj_is_active)
+        staff = User.objects.create(username='staff', is_staff=True)
+        active = User.objects.create(username='active')
+        inactive = User.objects.create(username='inactive', is_active=False)
+        users = User.objects.filter(pk__in=[staff.pk, active.pk, inactive.pk])
+
+        # The user-only parts fold into a constant for staff users.
+        bound = perm.bind(staff)
+        self.assertTrue(bound.is_constant)
+        self.assertTrue(bound(inactive))
+        self.assertEqual(bound.test_many([active, inactive]), [True, True])
+        self.assertEqual(set(bound.filter(users)), set(users))
+        self.assertEqual(calls, ['staff'])
+
+        # For other active users, only the object-level permission remains.
+        del calls[:]
+        bound = perm.bind(active)
+
+        self.assertFalse(bound.is_constant)
+        self.assertIs(bound.residual, obj_is_active)
+        self.assertEqual(bound.test_many([active, inactive]), [True, False])
+        self.assertEqual(set(bound.filter(users)), {staff, active})
+        self.assertEqual(calls, ['staff', 'active', active, inactive])
+
+        # Inactive users are denied the permission for any object.
+        bound = (~perm).bind(inactive)
+        self.assertTrue(bound.is_constant)
+        self.assertTrue(bound(active))
+        self.assertEqual(bound.filter(users).count(), 3)
+
+        # Folding keeps the outcome of all other combinations.
+        for expression in (user_is_active ^ obj_is_active, at_least(2, user_is_active, obj_is_active, ~user_is_staff)):
+            for user in (staff, active, inactive):
+                bound = expression.bind(user)
+                self.assertEqual(bound.test_many(users), [expression(user, obj) for obj in users])
+
+        # Operands with side effects aren't evaluated ahead of the object-level operands before them.
+        @permission(reads_object=False, order_sensitive=True)
+        def user_side_effect(user, obj=None):
+            calls.append('side_effect')
+            return True
+
+        del calls[:]
+        bound = (obj_is_active & user_side_effect).bind(active)
+
+        self.assertFalse(bound.is_constant)
+        self.assertEqual(calls, [])
+        # The decisions of the object-level operand have been cached above.
+        self.assertEqual(bound.test_many([active, inactive]), [True, False])
+        self.assertEqual(calls, ['side_effect'])
+
+        # User-only permissions can be translated into filters as well.
+        self.assertEqual(set(user_is_staff.filter(staff, users)), set(users))
+        self.assertEqual(list(user_is_staff.filter(active, users)), [])
+
     def test_builtin_permissions(self):
         """
         Tests the built-in permissions.